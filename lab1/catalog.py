@@ -0,0 +1,251 @@
+import argparse
+import hashlib
+import json
+import os
+import random
+import time
+
+import numpy as np
+
+from diet_ga import COLUMNS
+
+CACHE_VERSION = 1
+CHUNK_SIZE = 1 << 20  # Размер блока чтения исходного файла (для iter_json_array — в символах, файл читается как текст)
+_WHITESPACE = " \t\r\n"
+_DELIMITERS = _WHITESPACE + ",]"  # Символы, которыми может заканчиваться элемент массива
+
+
+def iter_json_array(path, chunk_size=CHUNK_SIZE):
+    """
+    Потоковый разбор JSON-файла с массивом объектов верхнего уровня:
+    элементы декодируются по одному, файл целиком в память не загружается.
+    :param path: Путь к файлу.
+    :param chunk_size: Размер блока чтения в символах.
+    :return: Итератор элементов массива.
+    """
+    decoder = json.JSONDecoder()
+    with open(path, "r", encoding="utf-8") as file:
+        buffer, position, started = "", 0, False
+        eof = False
+        while True:
+            # Пропуск пробелов и разделителей между элементами
+            while position < len(buffer) and (buffer[position] in _WHITESPACE or
+                                               (started and buffer[position] == ",")):
+                position += 1
+            if position < len(buffer) and not started:
+                if buffer[position] != "[":
+                    raise ValueError(f"{path}: ожидался массив JSON")
+                started, position = True, position + 1
+                continue
+            if position < len(buffer) and buffer[position] == "]":
+                return
+            if position < len(buffer):
+                try:
+                    item, end = decoder.raw_decode(buffer, position)
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                else:
+                    # Число, обрезанное границей чтения (например, "2" из "2.5"), декодируется
+                    # без ошибки, поэтому элемент принимается, только если за ним следует разделитель
+                    if eof or (end < len(buffer) and buffer[end] in _DELIMITERS):
+                        yield item
+                        position = end
+                        continue
+            if eof:
+                raise ValueError(f"{path}: неожиданный конец файла")
+            chunk = file.read(chunk_size)
+            eof = not chunk
+            buffer, position = buffer[position:] + chunk, 0
+
+
+def file_digest(path, chunk_size=CHUNK_SIZE):
+    """
+    SHA-256 содержимого файла (чтение блоками).
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(chunk_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def parse_catalog(records, seed=None):
+    """
+    Разбирает записи каталога в столбцы: строка 'bgu' делится на белки, жиры и углеводы,
+    цена генерируется random.Random(seed) (от 10 до 200 условных единиц).
+    :param records: Итерируемые записи с ключами name, bgu, kcal.
+    :return: Кортеж (матрица n x COLUMNS, список названий).
+    """
+    rng = random.Random(seed)
+    rows, names = [], []
+    for record in records:
+        proteins, fats, carbs = map(float, record["bgu"].split(","))
+        rows.append((rng.randint(10, 200), proteins, fats, carbs, float(record["kcal"])))
+        names.append(record["name"])
+    return np.array(rows, dtype=np.float64).reshape(len(rows), len(COLUMNS)), names
+
+
+class Catalog:
+    def __init__(self, matrix, name_offsets, name_data):
+        """
+        Каталог продуктов в столбцовом виде: числовая матрица (COLUMNS) и таблица названий
+        (байты UTF-8 подряд и смещения). Массивы могут быть отображены в память из кэша,
+        тогда столбцы — представления без копирования.
+        Элементы каталога доступны как словари продуктов (как в parse_products),
+        поэтому каталог можно передать в GeneticAlgorithm вместо списка.
+        :param matrix: Массив n x len(COLUMNS).
+        :param name_offsets: Массив n + 1 смещений названий в name_data.
+        :param name_data: Массив байтов названий.
+        """
+        self.matrix = matrix
+        self.name_offsets = name_offsets
+        self.name_data = name_data
+
+    @classmethod
+    def from_names(cls, matrix, names):
+        encoded = [name.encode("utf-8") for name in names]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(name) for name in encoded], out=offsets[1:])
+        return cls(matrix, offsets, np.frombuffer(b"".join(encoded), dtype=np.uint8))
+
+    def __len__(self):
+        return len(self.matrix)
+
+    def column(self, name):
+        """
+        Столбец каталога (price, proteins, fats, carbs или kcal).
+        """
+        return self.matrix[:, COLUMNS.index(name)]
+
+    def name(self, index):
+        start, end = self.name_offsets[index], self.name_offsets[index + 1]
+        return self.name_data[start:end].tobytes().decode("utf-8")
+
+    def names(self):
+        return [self.name(index) for index in range(len(self))]
+
+    def __getitem__(self, index):
+        index = int(index)
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        product = {"index": index, "name": self.name(index)}
+        product.update(zip(COLUMNS, self.matrix[index].tolist()))
+        product["price"] = int(product["price"])
+        return product
+
+    def __iter__(self):
+        return (self[index] for index in range(len(self)))
+
+    def records(self):
+        """
+        Список словарей продуктов (как parse_products).
+        """
+        return list(self)
+
+
+def _cache_files(cache_dir):
+    return {
+        "meta": os.path.join(cache_dir, "meta.json"),
+        "matrix": os.path.join(cache_dir, "matrix.npy"),
+        "name_offsets": os.path.join(cache_dir, "name_offsets.npy"),
+        "name_data": os.path.join(cache_dir, "name_data.npy"),
+    }
+
+
+def _source_stat(path):
+    stat = os.stat(path)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def _read_meta(files):
+    try:
+        with open(files["meta"], "r", encoding="utf-8") as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_meta(files, meta):
+    temporary = files["meta"] + ".tmp"
+    with open(temporary, "w", encoding="utf-8") as file:
+        json.dump(meta, file)
+    os.replace(temporary, files["meta"])
+
+
+def _cache_valid(path, files, meta, seed):
+    """
+    Проверяет кэш: сначала по размеру и времени изменения источника, при их расхождении —
+    по хэшу содержимого (файл мог быть перезаписан без изменений, тогда метаданные обновляются).
+    """
+    if meta is None or meta.get("version") != CACHE_VERSION or meta.get("seed") != seed:
+        return False
+    if not all(os.path.exists(files[key]) for key in ("matrix", "name_offsets", "name_data")):
+        return False
+    stat = _source_stat(path)
+    if stat == meta["source"]:
+        return True
+    if stat["size"] != meta["source"]["size"] or file_digest(path) != meta["sha256"]:
+        return False
+    _write_meta(files, dict(meta, source=stat))
+    return True
+
+
+def build_cache(path, cache_dir, seed=None):
+    """
+    Разбирает источник и записывает кэш. Метаданные записываются последними:
+    прерванная запись оставляет кэш недействительным, а не повреждённым.
+    :return: Catalog в памяти.
+    """
+    files = _cache_files(cache_dir)
+    os.makedirs(cache_dir, exist_ok=True)
+    if os.path.exists(files["meta"]):
+        os.remove(files["meta"])
+    stat = _source_stat(path)
+    matrix, names = parse_catalog(iter_json_array(path), seed)
+    catalog = Catalog.from_names(matrix, names)
+    for key in ("matrix", "name_offsets", "name_data"):
+        temporary = files[key] + ".tmp.npy"
+        np.save(temporary, getattr(catalog, key))
+        os.replace(temporary, files[key])
+    _write_meta(files, {"version": CACHE_VERSION, "seed": seed, "source": stat,
+                        "sha256": file_digest(path), "products": len(catalog)})
+    return catalog
+
+
+def load_catalog(path, seed=None, cache_dir=None, rebuild=False):
+    """
+    Загружает каталог продуктов: из кэша, если он соответствует источнику и зерну цен,
+    иначе разбирает источник и обновляет кэш.
+    :param path: Путь к products.json.
+    :param seed: Зерно генератора цен (random.Random).
+    :param cache_dir: Каталог кэша; None — <path>.cache рядом с источником.
+    :param rebuild: Пересоздать кэш независимо от его состояния.
+    :return: Catalog с массивами, отображёнными в память.
+    """
+    cache_dir = cache_dir or path + ".cache"
+    files = _cache_files(cache_dir)
+    if rebuild or not _cache_valid(path, files, _read_meta(files), seed):
+        build_cache(path, cache_dir, seed)
+    return Catalog(*(np.load(files[key], mmap_mode="r") for key in ("matrix", "name_offsets", "name_data")))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Построение кэша каталога продуктов")
+    parser.add_argument("path", help="Путь к products.json")
+    parser.add_argument("--seed", type=int, default=None, help="Зерно генератора цен")
+    parser.add_argument("--cache-dir", default=None, help="Каталог кэша (по умолчанию <path>.cache)")
+    parser.add_argument("--rebuild", action="store_true", help="Пересоздать кэш")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    catalog = load_catalog(args.path, seed=args.seed, cache_dir=args.cache_dir, rebuild=args.rebuild)
+    print(f"Продуктов: {len(catalog)}, загрузка: {(time.perf_counter() - started) * 1e3:.1f} мс")
+    for product in list(catalog)[:5]:
+        print(product)
+
+
+if __name__ == "__main__":
+    main()
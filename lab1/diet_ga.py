@@ -0,0 +1,402 @@
+import json
+import random
+
+import numpy as np
+
+# Константы генетического алгоритма по умолчанию
+POPULATION_SIZE = 50  # Количество индивидуумов в популяции
+MUTATION_RATE = 0.1  # Вероятность мутации
+CROSSOVER_RATE = 0.9  # Вероятность кроссовера
+MAX_GENERATIONS = 100  # Максимальное количество поколений
+NUM_PRODUCTS_PER_INDIVIDUAL = 30  # Количество продуктов в одном рационе (индивид)
+TOURNAMENT_SIZE = 5  # Размер турнира при отборе
+ELITE_SIZE = 2  # Количество лучших особей, переходящих в следующее поколение без изменений
+PENALTY_WEIGHT = 10  # Множитель штрафа за выход за пределы нормы
+FIXED_POINT_SCALE = 10 ** 4  # Суммы хранятся целыми в единицах 1/FIXED_POINT_SCALE (в products.json — до 4 знаков)
+
+# Столбцы матрицы продуктов
+COLUMNS = ("price", "proteins", "fats", "carbs", "kcal")
+NUTRIENTS = COLUMNS[1:]
+PRICE = COLUMNS.index("price")
+
+
+def parse_products(products, rng=random):
+    """
+    Разбирает записи products.json: строка 'bgu' делится на белки, жиры и углеводы,
+    цена генерируется случайно (от 10 до 200 условных единиц).
+    :param products: Список записей с ключами name, bgu, kcal.
+    :param rng: Генератор со методом randint (модуль random или random.Random).
+    :return: Список словарей продуктов.
+    """
+    parsed_products = []
+    for index, product in enumerate(products):
+        proteins, fats, carbs = map(float, product["bgu"].split(","))
+        parsed_products.append({
+            "index": index,
+            "name": product["name"],
+            "price": rng.randint(10, 200),
+            "proteins": proteins,
+            "fats": fats,
+            "carbs": carbs,
+            "kcal": float(product["kcal"]),
+        })
+    return parsed_products
+
+
+def load_products(path, rng=random):
+    """
+    Загружает и разбирает продукты из JSON-файла (см. parse_products).
+    """
+    with open(path, "r", encoding="utf-8") as file:
+        return parse_products(json.load(file), rng)
+
+
+def product_matrix(products):
+    """
+    Матрица продуктов: строка — продукт, столбцы — цена, белки, жиры, углеводы, ккал (COLUMNS).
+    :param products: Список словарей продуктов или Catalog (его матрица используется без копирования).
+    :return: Массив n x 5.
+    """
+    matrix = getattr(products, "matrix", None)
+    if matrix is not None:
+        return np.asarray(matrix, dtype=float)
+    return np.array([[product[column] for column in COLUMNS] for product in products], dtype=float)
+
+
+def fixed_point(matrix):
+    """
+    Матрица продуктов в целых единицах 1/FIXED_POINT_SCALE: суммы рационов и их обновления
+    по изменённым генам вычисляются точно, без ошибки округления.
+    :param matrix: Матрица продуктов (product_matrix).
+    :return: Массив int64 той же формы.
+    :raises ValueError: Если значения нельзя точно представить с шагом 1/FIXED_POINT_SCALE.
+    """
+    scaled = np.asarray(matrix, dtype=float) * FIXED_POINT_SCALE
+    fixed = np.rint(scaled).astype(np.int64)
+    if not np.allclose(fixed, scaled, rtol=0, atol=1e-6):
+        raise ValueError(f"Значения продуктов должны быть кратны 1/{FIXED_POINT_SCALE}")
+    return fixed
+
+
+def norm_bounds(norm_ranges):
+    """
+    Границы норм в виде массивов в порядке NUTRIENTS.
+    :param norm_ranges: Словарь показатель -> (минимум, максимум).
+    :return: Кортеж (нижние границы, верхние границы).
+    """
+    bounds = np.array([norm_ranges[nutrient] for nutrient in NUTRIENTS], dtype=float)
+    return bounds[:, 0], bounds[:, 1]
+
+
+class GeneticAlgorithm:
+    def __init__(self, products, norm_ranges, population_size=POPULATION_SIZE,
+                 products_per_individual=NUM_PRODUCTS_PER_INDIVIDUAL, crossover_rate=CROSSOVER_RATE,
+                 mutation_rate=MUTATION_RATE, crossover="crossover", mutation="swap_mutation",
+                 exclusive=True, seed=None, rng=None):
+        """
+        Генетический алгоритм подбора рациона минимальной стоимости в пределах норм БЖУ и калорий.
+        Продукты хранятся матрицей, индивидуум — массив индексов продуктов, популяция — матрица
+        индексов (особи x продукты). Для каждой особи хранятся суммы цены и показателей
+        (totals_values, целые в единицах 1/FIXED_POINT_SCALE): операторы скрещивания и мутации
+        обновляют их по изменённым генам, поэтому приспособленность потомка считается без повторного
+        суммирования всего рациона, а суммы точно совпадают с полным суммированием.
+        :param products: Список словарей продуктов (parse_products).
+        :param norm_ranges: Словарь показатель -> (минимум, максимум).
+        :param population_size: Размер популяции.
+        :param products_per_individual: Количество продуктов в рационе.
+        :param crossover: Оператор скрещивания: crossover, two_point_crossover, k_point_crossover
+                          или uniform_crossover.
+        :param mutation: Оператор мутации: mutate, swap_mutation или reverse_mutation.
+        :param exclusive: Продукты начальной популяции не повторяются между особями и удаляются
+                          из общего пула (мутация mutate берёт продукты из оставшегося пула);
+                          False — особи выбирают продукты независимо, что позволяет популяции
+                          быть больше, чем число продуктов / размер рациона.
+        :param seed: Зерно генератора, если rng не задан.
+        :param rng: numpy.random.Generator.
+        """
+        self.products = products
+        self.matrix = product_matrix(products)
+        self.fixed_matrix = fixed_point(self.matrix)
+        self.lower, self.upper = norm_bounds(norm_ranges)
+        self.population_size = population_size
+        self.products_per_individual = products_per_individual
+        self.crossover_rate = crossover_rate
+        self.mutation_rate = mutation_rate
+        self.crossover_operator = getattr(self, crossover)
+        self.mutation_operator = getattr(self, mutation)
+        self.exclusive = exclusive
+        self.rng = rng if rng is not None else np.random.default_rng(seed)
+        self.pool = np.arange(len(products))  # Продукты, доступные для мутации mutate
+        self.population = np.empty((0, products_per_individual), dtype=np.int64)
+        self.totals_values = np.empty((0, len(COLUMNS)), dtype=np.int64)
+        self.fitness_values = np.empty(0)
+        self.max_fitness_values = []
+        self.mean_fitness_values = []
+
+    # Инициализация начальной популяции
+    def initialize_population(self):
+        size, length = self.population_size, self.products_per_individual
+        if not self.exclusive:
+            self.population = np.array([self.rng.choice(len(self.products), length, replace=False)
+                                        for _ in range(size)], dtype=np.int64).reshape(size, length)
+            self.pool = np.arange(len(self.products))
+        else:
+            if len(self.products) < size * length:
+                print("Недостаточно продуктов для создания популяции!")
+                size = len(self.products) // length
+            # Уникальные наборы продуктов: выбранные продукты удаляются из общего пула
+            order = self.rng.permutation(len(self.products))
+            self.population = order[:size * length].reshape(size, length)
+            self.pool = np.sort(order[size * length:])
+        self.evaluate()
+
+    def totals(self, population):
+        """
+        Суммарные цена, белки, жиры, углеводы и ккал рационов.
+        :param population: Матрица индексов продуктов (особи x продукты).
+        :return: Матрица особи x COLUMNS (int64, единицы 1/FIXED_POINT_SCALE).
+        """
+        return self.fixed_matrix[population].sum(axis=1)
+
+    def fitness_of_totals(self, totals):
+        """
+        Приспособленность по суммам: стоимость + штрафы (чем ниже, тем лучше).
+        Штраф показателя вне нормы — отклонение от верхней границы.
+        :param totals: Суммы в единицах 1/FIXED_POINT_SCALE (см. totals); границы норм
+                       переводятся в те же единицы, поэтому сравнение с ними точное.
+        """
+        lower, upper = self.lower * FIXED_POINT_SCALE, self.upper * FIXED_POINT_SCALE
+        nutrients = totals[:, 1:]
+        outside = (nutrients < lower) | (nutrients > upper)
+        penalties = np.where(outside, np.abs(nutrients - upper), 0.0).sum(axis=1)
+        return (totals[:, PRICE] + penalties * PENALTY_WEIGHT) / FIXED_POINT_SCALE
+
+    def population_fitness(self, population):
+        """
+        Приспособленность каждой особи популяции.
+        """
+        return self.fitness_of_totals(self.totals(population))
+
+    def fitness(self, individual):
+        """
+        Приспособленность одного рациона.
+        :param individual: Массив индексов продуктов.
+        """
+        return float(self.population_fitness(np.asarray(individual)[None, :])[0])
+
+    def evaluate(self):
+        """
+        Пересчитывает суммы и приспособленность текущей популяции полностью.
+        """
+        self.totals_values = self.totals(self.population)
+        self.fitness_values = self.fitness_of_totals(self.totals_values)
+        return self.fitness_values
+
+    def _gene_delta(self, rows, new_genes, old_genes, count):
+        """
+        Изменение сумм особей при замене генов: строки rows получают продукты new_genes вместо old_genes.
+        :return: Матрица count x COLUMNS.
+        """
+        delta = np.zeros((count, len(COLUMNS)), dtype=np.int64)
+        np.add.at(delta, rows, self.fixed_matrix[new_genes] - self.fixed_matrix[old_genes])
+        return delta
+
+    # Турнирный отбор
+    def tournament_selection(self, count):
+        """
+        Проводит count турниров по TOURNAMENT_SIZE особей.
+        :return: Индексы победителей в популяции.
+        """
+        size = min(TOURNAMENT_SIZE, len(self.population))
+        if size == len(self.population):
+            tournaments = np.array([self.rng.permutation(size) for _ in range(count)]).reshape(count, size)
+        else:
+            # Турнир из различных особей: повторы внутри строки перевыбираются
+            tournaments = self.rng.integers(len(self.population), size=(count, size))
+            while True:
+                ordered = np.sort(tournaments, axis=1)
+                repeated = (ordered[:, 1:] == ordered[:, :-1]).any(axis=1)
+                if not repeated.any():
+                    break
+                tournaments[repeated] = self.rng.integers(len(self.population), size=(repeated.sum(), size))
+        winners = self.fitness_values[tournaments].argmin(axis=1)
+        return tournaments[np.arange(count), winners]
+
+    def _crossing(self, parents1, parents2, totals1, totals2, masks):
+        """
+        Скрещивание пар по маскам: в позициях маски потомок 1 берёт гены второго родителя.
+        Пары, для которых скрещивание не выпало (crossover_rate), остаются без изменений.
+        Суммы потомка 1 считаются от ближайшего родителя по меньшей части генов
+        (сумма генов пары не меняется, поэтому суммы потомка 2 = суммы родителей - суммы потомка 1).
+        :return: Кортеж (потомки 1, потомки 2, их суммы, их суммы).
+        """
+        masks &= (self.rng.random(len(parents1)) < self.crossover_rate)[:, None]
+        children1, children2 = np.where(masks, parents2, parents1), np.where(masks, parents1, parents2)
+
+        # Потомок 1 отличается от второго родителя в немаскированных позициях
+        closer = masks.sum(axis=1) * 2 > self.products_per_individual
+        changed = masks ^ closer[:, None]
+        bases = np.where(closer[:, None], parents2, parents1)
+        rows, columns = np.nonzero(changed)
+        child_totals1 = np.where(closer[:, None], totals2, totals1) + self._gene_delta(
+            rows, children1[rows, columns], bases[rows, columns], len(parents1))
+        return children1, children2, child_totals1, totals1 + totals2 - child_totals1
+
+    # Одноточечное скрещивание
+    def crossover(self, parents1, parents2, totals1, totals2):
+        points = self.rng.integers(1, self.products_per_individual, size=len(parents1))
+        return self._crossing(parents1, parents2, totals1, totals2,
+                              np.arange(self.products_per_individual) >= points[:, None])
+
+    # Двухточечное скрещивание
+    def two_point_crossover(self, parents1, parents2, totals1, totals2):
+        points = np.sort(self._cut_points(len(parents1), 2), axis=1)
+        positions = np.arange(self.products_per_individual)
+        return self._crossing(parents1, parents2, totals1, totals2,
+                              (positions >= points[:, :1]) & (positions < points[:, 1:]))
+
+    # k-точечное скрещивание
+    def k_point_crossover(self, parents1, parents2, totals1, totals2, k=3):
+        points = self._cut_points(len(parents1), k)
+        # Позиция после чётного числа разрезов берётся от первого родителя, после нечётного — от второго
+        cuts = (np.arange(self.products_per_individual)[None, :, None] >= points[:, None, :]).sum(axis=2)
+        return self._crossing(parents1, parents2, totals1, totals2, cuts % 2 == 1)
+
+    # Равномерное скрещивание
+    def uniform_crossover(self, parents1, parents2, totals1, totals2):
+        return self._crossing(parents1, parents2, totals1, totals2, self.rng.random(parents1.shape) >= 0.5)
+
+    def _cut_points(self, count, k, low=1):
+        """
+        k различных точек из low..products_per_individual-1 для каждой пары.
+        """
+        keys = self.rng.random((count, self.products_per_individual - low))
+        return np.argpartition(keys, k - 1, axis=1)[:, :k] + low
+
+    def _mutants(self, population):
+        """Индексы особей, которые мутируют (mutation_rate)."""
+        return np.flatnonzero(self.rng.random(len(population)) < self.mutation_rate)
+
+    # Мутация заменой продукта на продукт из общего пула, которого нет в рационе
+    def mutate(self, population, totals):
+        mutants = self._mutants(population)
+        if not mutants.size or not self.pool.size:
+            return population, totals
+        positions = self.rng.integers(self.products_per_individual, size=mutants.size)
+        candidates = self.pool[self.rng.integers(self.pool.size, size=mutants.size)]
+        # Проверка повторов — векторный просмотр генов мутантов (мутирует лишь доля mutation_rate особей)
+        pending = (population[mutants] == candidates[:, None]).any(axis=1)
+        for _ in range(100):  # Перевыбор продуктов, уже входящих в рацион
+            if not pending.any():
+                break
+            candidates[pending] = self.pool[self.rng.integers(self.pool.size, size=pending.sum())]
+            pending[pending] = (population[mutants[pending]] == candidates[pending, None]).any(axis=1)
+        rows, columns, genes = mutants[~pending], positions[~pending], candidates[~pending]
+        totals[rows] += self.fixed_matrix[genes] - self.fixed_matrix[population[rows, columns]]
+        population[rows, columns] = genes
+        return population, totals
+
+    # Мутация обменом (состав рациона и суммы не меняются)
+    def swap_mutation(self, population, totals):
+        mutants = self._mutants(population)
+        first = self.rng.integers(self.products_per_individual, size=mutants.size)
+        second = (first + self.rng.integers(1, self.products_per_individual, size=mutants.size)) \
+            % self.products_per_individual
+        population[mutants, first], population[mutants, second] = \
+            population[mutants, second], population[mutants, first]
+        return population, totals
+
+    # Мутация обращением (состав рациона и суммы не меняются)
+    def reverse_mutation(self, population, totals):
+        mutants = self._mutants(population)
+        if not mutants.size:
+            return population, totals
+        bounds = np.sort(self._cut_points(mutants.size, 2, low=0), axis=1)
+        start, end = bounds[:, :1], bounds[:, 1:]
+        positions = np.arange(self.products_per_individual)[None, :]
+        inside = (positions >= start) & (positions < end)
+        source = np.where(inside, start + end - 1 - positions, positions)
+        population[mutants] = np.take_along_axis(population[mutants], source, axis=1)
+        return population, totals
+
+    # Эволюция популяции
+    def evolve_population(self):
+        size = len(self.population)
+        elite_size = min(ELITE_SIZE, size)
+        # Сохранение лучших особей
+        elite = np.argsort(self.fitness_values, kind="stable")[:elite_size]
+
+        # Создание новой популяции: пары родителей из турниров, скрещивание, мутация
+        pairs = -(-(size - elite_size) // 2)
+        winners = self.tournament_selection(2 * pairs)
+        parents, totals = self.population[winners], self.totals_values[winners]
+        children1, children2, totals1, totals2 = self.crossover_operator(
+            parents[:pairs], parents[pairs:], totals[:pairs], totals[pairs:])
+        offspring = np.stack([children1, children2], axis=1).reshape(2 * pairs, -1)[:size - elite_size]
+        offspring_totals = np.stack([totals1, totals2], axis=1).reshape(2 * pairs, -1)[:size - elite_size]
+        offspring, offspring_totals = self.mutation_operator(offspring, offspring_totals)
+
+        self.population = np.concatenate([self.population[elite], offspring])
+        self.totals_values = np.concatenate([self.totals_values[elite], offspring_totals])
+        self.fitness_values = self.fitness_of_totals(self.totals_values)
+
+    def record_statistics(self):
+        """
+        Сохраняет лучшую (минимальную) и среднюю приспособленность текущего поколения.
+        """
+        best, mean = float(self.fitness_values.min()), float(self.fitness_values.mean())
+        self.max_fitness_values.append(best)
+        self.mean_fitness_values.append(mean)
+        return best, mean
+
+    # Основной метод запуска генетического алгоритма
+    def run(self, generations=MAX_GENERATIONS, verbose=True):
+        """
+        :param generations: Количество поколений.
+        :param verbose: Печатать статистику каждого поколения.
+        :return: Лучший рацион (массив индексов продуктов).
+        """
+        self.initialize_population()
+        self.evolve(generations, verbose)
+        return self.best_individual()
+
+    def evolve(self, generations, verbose=False):
+        """
+        Продолжает эволюцию текущей популяции на generations поколений, сохраняя статистику.
+        """
+        for _ in range(generations):
+            best, mean = self.record_statistics()
+            if verbose:
+                print(f"Поколение {len(self.max_fitness_values) - 1}: Макс. штраф = {best}, Средний штраф = {mean}")
+            self.evolve_population()
+
+    def emigrants(self, count):
+        """
+        Копии count лучших особей (для миграции между островами).
+        :return: Кортеж (матрица индексов продуктов, приспособленность).
+        """
+        best = np.argsort(self.fitness_values, kind="stable")[:count]
+        return self.population[best].copy(), self.fitness_values[best].copy()
+
+    def immigrate(self, individuals, fitness_values):
+        """
+        Заменяет худших особей популяции прибывшими.
+        :param individuals: Матрица индексов продуктов.
+        :param fitness_values: Приспособленность прибывших особей.
+        """
+        worst = np.argsort(self.fitness_values, kind="stable")[len(self.population) - len(individuals):]
+        self.population[worst] = individuals
+        self.totals_values[worst] = self.totals(individuals)
+        self.fitness_values[worst] = fitness_values
+
+    def best_individual(self):
+        """
+        Индивидуум с наименьшей приспособленностью.
+        """
+        return self.population[int(self.fitness_values.argmin())]
+
+    def describe(self, individual):
+        """
+        Продукты рациона в виде словарей.
+        """
+        return [self.products[index] for index in individual]
@@ -0,0 +1,199 @@
+from concurrent.futures import ProcessPoolExecutor, wait
+from multiprocessing import Manager
+from multiprocessing.shared_memory import SharedMemory
+from threading import BrokenBarrierError
+
+import numpy as np
+
+from diet_ga import CROSSOVER_RATE, MAX_GENERATIONS, MUTATION_RATE, NUM_PRODUCTS_PER_INDIVIDUAL, GeneticAlgorithm
+
+MIGRATION_INTERVAL = 10  # Количество поколений между миграциями
+MIGRANTS = 2  # Количество лучших особей, отправляемых на соседний остров
+BARRIER_TIMEOUT = 600  # Максимальное ожидание остальных островов при миграции (секунды)
+
+
+def _migration_buffers(memory, islands, migrants, length):
+    """
+    Представления общей памяти миграции: особи (острова x мигранты x продукты)
+    и их приспособленность (острова x мигранты).
+    """
+    individuals = np.ndarray((islands, migrants, length), dtype=np.int64, buffer=memory.buf)
+    fitness = np.ndarray((islands, migrants), dtype=np.float64, buffer=memory.buf, offset=individuals.nbytes)
+    return individuals, fitness
+
+
+def _run_island(task):
+    """
+    Эволюция одного острова в рабочем процессе. Каждые migration_interval поколений остров
+    записывает лучших особей в свою ячейку общей памяти, дожидается остальных островов
+    и заменяет своих худших особей мигрантами с предыдущего острова по кольцу.
+    :param task: Словарь параметров острова (см. IslandModel._tasks).
+    :return: Статистика и лучший рацион острова.
+    """
+    index, islands = task["index"], task["islands"]
+    barrier, timeout = task["barrier"], task["barrier_timeout"]
+    memory = individuals = fitness = None
+    try:
+        ga = GeneticAlgorithm(task["products"], task["norm_ranges"], rng=np.random.default_rng(task["seed"]),
+                              **task["options"])
+        ga.initialize_population()
+        migrants = min(task["migrants"], len(ga.population))
+        memory = SharedMemory(name=task["memory"])
+        individuals, fitness = _migration_buffers(memory, islands, task["migrants"], ga.products_per_individual)
+        remaining = task["generations"]
+        while remaining > 0:
+            step = min(task["migration_interval"], remaining)
+            ga.evolve(step)
+            remaining -= step
+            if remaining <= 0 or islands < 2 or not migrants:
+                continue
+            individuals[index, :migrants], fitness[index, :migrants] = ga.emigrants(migrants)
+            barrier.wait(timeout)  # Все острова записали мигрантов
+            source = (index - 1) % islands
+            ga.immigrate(individuals[source, :migrants].copy(), fitness[source, :migrants].copy())
+            barrier.wait(timeout)  # Все острова прочитали мигрантов, ячейки можно перезаписывать
+    except BaseException:
+        barrier.abort()  # Остальные острова не должны ждать упавший остров (в том числе при запуске)
+        raise
+    finally:
+        del individuals, fitness  # Представления должны быть освобождены до закрытия памяти
+        if memory is not None:
+            memory.close()
+
+    best = ga.best_individual()
+    return {
+        "index": index,
+        "population": len(ga.population),
+        "max_fitness_values": ga.max_fitness_values,
+        "mean_fitness_values": ga.mean_fitness_values,
+        "best_individual": best.tolist(),
+        "best_fitness": ga.fitness(best),
+    }
+
+
+class IslandModel:
+    def __init__(self, products, norm_ranges, islands=4, migration_interval=MIGRATION_INTERVAL,
+                 migrants=MIGRANTS, seed=None, island_options=None, barrier_timeout=BARRIER_TIMEOUT, **options):
+        """
+        Островная модель генетического алгоритма: острова (подпопуляции) эволюционируют
+        параллельно в пуле процессов и периодически обмениваются лучшими особями
+        через общую память (кольцевая миграция).
+        :param products: Список словарей продуктов (parse_products).
+        :param norm_ranges: Словарь показатель -> (минимум, максимум).
+        :param islands: Количество островов (и процессов).
+        :param migration_interval: Количество поколений между миграциями.
+        :param migrants: Количество особей, мигрирующих с острова.
+        :param seed: Зерно: генераторы островов порождаются из одного SeedSequence.
+        :param island_options: Список словарей параметров GeneticAlgorithm для каждого острова
+                               (например, свои mutation_rate и crossover_rate); None — разброс
+                               вероятностей мутации и кроссовера вокруг значений по умолчанию.
+        :param barrier_timeout: Максимальное ожидание остальных островов при миграции (секунды);
+                                при его превышении запуск завершается ошибкой.
+        :param options: Общие параметры GeneticAlgorithm для всех островов.
+        """
+        self.products = products
+        self.norm_ranges = norm_ranges
+        self.islands = islands
+        self.migration_interval = migration_interval
+        self.migrants = migrants
+        self.seed = seed
+        self.options = options
+        self.island_options = island_options or default_island_options(islands)
+        self.barrier_timeout = barrier_timeout
+        self.results = []
+        self.max_fitness_values = []
+        self.mean_fitness_values = []
+        self.best_fitness = None
+        self._best = None
+
+    def _tasks(self, generations, memory, barrier):
+        seeds = np.random.SeedSequence(self.seed).spawn(self.islands)
+        return [
+            {
+                "index": index,
+                "islands": self.islands,
+                "products": self.products,
+                "norm_ranges": self.norm_ranges,
+                "options": {**self.options, **self.island_options[index]},
+                "seed": seeds[index],
+                "generations": generations,
+                "migration_interval": self.migration_interval,
+                "migrants": self.migrants,
+                "memory": memory.name,
+                "barrier": barrier,
+                "barrier_timeout": self.barrier_timeout,
+            }
+            for index in range(self.islands)
+        ]
+
+    def run(self, generations=MAX_GENERATIONS, verbose=True):
+        """
+        Запускает острова; каждому острову нужен свой процесс, так как миграция синхронна.
+        :param generations: Количество поколений на каждом острове.
+        :param verbose: Печатать объединённую статистику поколений.
+        :return: Лучший рацион среди всех островов (массив индексов продуктов).
+        """
+        length = self.options.get("products_per_individual", NUM_PRODUCTS_PER_INDIVIDUAL)
+        size = self.islands * self.migrants * (length * np.dtype(np.int64).itemsize + np.dtype(np.float64).itemsize)
+        memory = SharedMemory(create=True, size=max(size, 1))
+        try:
+            with Manager() as manager, ProcessPoolExecutor(max_workers=self.islands) as executor:
+                barrier = manager.Barrier(self.islands)
+                futures = [executor.submit(_run_island, task) for task in self._tasks(generations, memory, barrier)]
+                wait(futures)
+            # Сначала сообщаем об исходной ошибке, а не о сломанном барьере у остальных островов
+            errors = [future.exception() for future in futures if future.exception() is not None]
+            if errors:
+                raise next((error for error in errors if not isinstance(error, BrokenBarrierError)), errors[0])
+            self.results = [future.result() for future in futures]
+        finally:
+            memory.close()
+            memory.unlink()
+
+        self.merge_statistics()
+        if verbose:
+            for generation, (best, mean) in enumerate(zip(self.max_fitness_values, self.mean_fitness_values)):
+                print(f"Поколение {generation}: Макс. штраф = {best}, Средний штраф = {mean}")
+        return self.best_individual()
+
+    def merge_statistics(self):
+        """
+        Объединяет статистику островов: лучший штраф поколения — минимум по островам,
+        средний — среднее по всем особям (с учётом размеров островов).
+        """
+        best = np.array([result["max_fitness_values"] for result in self.results])
+        mean = np.array([result["mean_fitness_values"] for result in self.results])
+        sizes = np.array([result["population"] for result in self.results], dtype=float)
+        self.max_fitness_values = best.min(axis=0).tolist()
+        self.mean_fitness_values = (sizes @ mean / sizes.sum()).tolist()
+        winner = min(self.results, key=lambda result: result["best_fitness"])
+        self.best_fitness = winner["best_fitness"]
+        self._best = np.array(winner["best_individual"])
+
+    def best_individual(self):
+        """
+        Лучший рацион среди всех островов.
+        """
+        return self._best
+
+    def describe(self, individual):
+        """
+        Продукты рациона в виде словарей.
+        """
+        return [self.products[index] for index in individual]
+
+
+def default_island_options(islands):
+    """
+    Параметры островов по умолчанию: вероятности мутации и кроссовера равномерно
+    распределены вокруг MUTATION_RATE и CROSSOVER_RATE, чтобы острова исследовали
+    пространство по-разному.
+    """
+    spread = np.linspace(-1, 1, islands) if islands > 1 else np.zeros(1)
+    return [
+        {
+            "mutation_rate": float(np.clip(MUTATION_RATE * (1 + shift), 0, 1)),
+            "crossover_rate": float(np.clip(CROSSOVER_RATE + 0.1 * shift, 0, 1)),
+        }
+        for shift in spread
+    ]
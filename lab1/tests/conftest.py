@@ -0,0 +1,7 @@
+import os
+import sys
+
+# Модули лабораторной импортируются по имени (как в ноутбуке), из каталога lab1
+LAB_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, LAB_DIR)
+PRODUCTS_PATH = os.path.join(LAB_DIR, "products.json")
@@ -0,0 +1,23 @@
+import json
+
+import pytest
+
+from catalog import iter_json_array
+from conftest import PRODUCTS_PATH
+
+MIXED = '[1, 2.5, 300, true, null, {"a":[1,2]}, "x,]"]'
+
+
+@pytest.mark.parametrize("chunk_size", range(1, 13))
+def test_iter_json_array_chunk_boundaries(tmp_path, chunk_size):
+    # Числа, разрезанные границей чтения ("2" + ".5"), не должны декодироваться по частям
+    path = tmp_path / "mixed.json"
+    path.write_text(MIXED, encoding="utf-8")
+    assert list(iter_json_array(str(path), chunk_size)) == json.loads(MIXED)
+
+
+@pytest.mark.parametrize("chunk_size", range(1, 13))
+def test_iter_json_array_products(chunk_size):
+    with open(PRODUCTS_PATH, "r", encoding="utf-8") as file:
+        expected = json.load(file)
+    assert list(iter_json_array(PRODUCTS_PATH, chunk_size)) == expected
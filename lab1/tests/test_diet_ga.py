@@ -0,0 +1,37 @@
+import random
+
+import numpy as np
+import pytest
+
+from conftest import PRODUCTS_PATH
+from diet_ga import GeneticAlgorithm, load_products
+
+CROSSOVERS = ("crossover", "two_point_crossover", "k_point_crossover", "uniform_crossover")
+MUTATIONS = ("mutate", "swap_mutation", "reverse_mutation")
+# Границы жиров, на которых накопленная ошибка сумм в плавающей точке меняла штраф
+NORM_RANGES = {"proteins": (50, 100), "fats": (50, 70), "carbs": (200, 300), "kcal": (1800, 2500)}
+
+
+@pytest.fixture(scope="module")
+def products():
+    return load_products(PRODUCTS_PATH, random.Random(0))
+
+
+@pytest.mark.parametrize("mutation", MUTATIONS)
+@pytest.mark.parametrize("crossover", CROSSOVERS)
+def test_delta_totals_match_full_sum(products, crossover, mutation):
+    ga = GeneticAlgorithm(products, NORM_RANGES, population_size=100, crossover=crossover,
+                          mutation=mutation, exclusive=False, seed=1)
+    ga.initialize_population()
+    ga.evolve(50)
+    np.testing.assert_array_equal(ga.totals_values, ga.totals(ga.population))
+    np.testing.assert_array_equal(ga.fitness_values, ga.population_fitness(ga.population))
+
+
+def test_mutate_keeps_products_unique(products):
+    ga = GeneticAlgorithm(products[:40], NORM_RANGES, population_size=200, mutation_rate=1.0,
+                          mutation="mutate", exclusive=False, seed=1)
+    ga.initialize_population()
+    population, totals = ga.mutate(ga.population.copy(), ga.totals_values.copy())
+    assert all(len(set(individual)) == len(individual) for individual in population.tolist())
+    np.testing.assert_array_equal(totals, ga.totals(population))
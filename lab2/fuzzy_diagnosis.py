@@ -0,0 +1,224 @@
+import argparse
+import csv
+import os
+import sys
+
+import numpy as np
+
+try:
+    import matplotlib.pyplot as plt
+except ImportError:  # Графики нужны только в plot_fuzzy_set
+    plt = None
+
+# Лингвистические переменные и треугольные функции принадлежности — общий реестр из lab3
+LAB3_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "lab3")
+if LAB3_DIR not in sys.path:
+    sys.path.append(LAB3_DIR)
+
+from fuzzy_logic import FuzzyRegistry  # noqa: E402
+
+# Нечеткие множества для медицинской диагностики: категория -> метка -> (левая граница, пик, правая граница)
+# (формат термов FuzzyRegistry.load_config без таблиц поиска: показания дробные)
+FUZZY_SETS = {
+    "Температура тела": {
+        "низкая": (34, 35, 36),
+        "нормальная": (36, 36.5, 37.5),
+        "высокая": (37.5, 38, 39),
+        "критическая": (39, 40, 41)
+    },
+    "Уровень боли": {
+        "нет боли": (0, 1, 2),
+        "легкая": (1, 3, 5),
+        "средняя": (4, 6, 8),
+        "сильная": (7, 9, 10)
+    }
+}
+
+# Диапазоны значений для графиков
+PLOT_RANGES = {
+    "Температура тела": (0, 42),
+    "Уровень боли": (0, 10)
+}
+PLOT_POINTS = 500
+
+
+class FuzzyDiagnosis:
+    def __init__(self, fuzzy_sets=FUZZY_SETS, plot_ranges=PLOT_RANGES, plot_points=PLOT_POINTS):
+        """
+        Пакетная нечеткая диагностика: принадлежности целых массивов показаний
+        ко всем термам категории считаются одной матричной операцией.
+        Категории — лингвистические переменные общего реестра нечеткой логики (lab3/fuzzy_logic.py).
+        :param fuzzy_sets: Конфигурация переменных в формате FuzzyRegistry.load_config
+                           (категория -> метка -> (a, b, c) либо {"universe", "terms"}).
+        :param plot_ranges: Словарь категория -> (минимум, максимум) для кривых графиков.
+        :param plot_points: Количество точек кривой.
+        """
+        self.registry = FuzzyRegistry()
+        self.registry.load_config(fuzzy_sets)
+        self.plot_ranges = plot_ranges
+        self.plot_points = plot_points
+        self._curves = {}
+
+    def labels(self, category):
+        """
+        Метки термов категории в порядке столбцов матрицы принадлежностей.
+        """
+        return list(self.registry[category].labels)
+
+    def memberships(self, category, values):
+        """
+        Степени принадлежности показаний ко всем термам категории.
+        :param category: Название категории.
+        :param values: Число или массив показаний.
+        :return: Матрица показания x термы (для числа — вектор по термам).
+        """
+        memberships, _ = self.registry[category].memberships_array(np.asarray(values, dtype=float))
+        return memberships
+
+    def diagnose(self, category, values):
+        """
+        Принадлежности и терм с наибольшей степенью для каждого показания.
+        :param category: Название категории.
+        :param values: Массив показаний.
+        :return: Кортеж (матрица принадлежностей, коды термов, метки термов).
+                 Показание, не принадлежащее ни одному терму (или NaN), получает код -1 и метку None.
+        """
+        values = np.atleast_1d(np.asarray(values, dtype=float))
+        memberships, codes = self.registry[category].memberships_array(values)
+        codes = np.where(memberships.max(axis=-1) > 0, codes, -1)
+        labels = np.array(self.labels(category) + [None], dtype=object)[codes]
+        return memberships, codes, labels
+
+    def screen(self, readings):
+        """
+        Диагностика набора показаний по всем категориям, для которых есть столбцы.
+        :param readings: Словарь категория -> массив показаний (например, из read_readings).
+        :return: Словарь категория -> {"terms", "memberships", "codes", "labels"}.
+        """
+        results = {}
+        for category, values in readings.items():
+            if category in self.registry:
+                memberships, codes, labels = self.diagnose(category, values)
+                results[category] = {"terms": self.labels(category), "memberships": memberships,
+                                     "codes": codes, "labels": labels}
+        return results
+
+    def curves(self, category):
+        """
+        Кривые принадлежности для графиков, вычисленные один раз для категории.
+        :return: Кортеж (значения x, матрица x x термы).
+        """
+        if category not in self._curves:
+            low, high = self.plot_ranges.get(category, (0, 10))
+            x_values = np.linspace(low, high, self.plot_points)
+            curves = self.memberships(category, x_values)
+            x_values.flags.writeable = False
+            curves.flags.writeable = False
+            self._curves[category] = (x_values, curves)
+        return self._curves[category]
+
+
+def read_readings(path, columns=None, delimiter=","):
+    """
+    Читает показания пациентов из CSV-файла с заголовком.
+    Числами читаются только столбцы-категории, остальные столбцы (например, имя пациента)
+    сохраняются как текст, чтобы результаты можно было сопоставить с записями.
+    :param path: Путь к файлу.
+    :param columns: Названия столбцов, читаемых как числа; None — категории FUZZY_SETS.
+    :param delimiter: Разделитель.
+    :return: Словарь столбец -> массив в порядке столбцов файла: для числовых столбцов — массив
+             показаний (пустое или нечисловое значение — NaN), для остальных — массив строк.
+    """
+    numeric = set(columns or FUZZY_SETS)
+    with open(path, "r", encoding="utf-8", newline="") as file:
+        reader = csv.DictReader(file, delimiter=delimiter)
+        values = {column: [] for column in reader.fieldnames or []}
+        for row in reader:
+            for column in values:
+                values[column].append(row.get(column) or "")
+    return {
+        column: (np.array([_number(text) for text in column_values], dtype=float) if column in numeric
+                 else np.array(column_values, dtype=object))
+        for column, column_values in values.items()
+    }
+
+
+def _number(text):
+    try:
+        return float(text.replace(",", ".")) if text else np.nan
+    except ValueError:
+        return np.nan
+
+
+def _cell(value):
+    if isinstance(value, float) and np.isnan(value):
+        return ""
+    return value
+
+
+def write_diagnoses(path, readings, results, delimiter=","):
+    """
+    Записывает результаты screen в CSV: исходные столбцы (текстовые — без изменений),
+    метка терма и степени принадлежности.
+    """
+    rows = len(next(iter(readings.values()))) if readings else 0
+    header = list(readings)
+    for category, result in results.items():
+        header.append(f"{category}: терм")
+        header.extend(f"{category}: {label}" for label in result["terms"])
+    with open(path, "w", encoding="utf-8", newline="") as file:
+        writer = csv.writer(file, delimiter=delimiter)
+        writer.writerow(header)
+        for index in range(rows):
+            row = [_cell(readings[column][index]) for column in readings]
+            for result in results.values():
+                row.append(result["labels"][index] or "")
+                row.extend(f"{value:.2f}" for value in result["memberships"][index])
+            writer.writerow(row)
+
+
+def plot_fuzzy_set(diagnosis, category, value):
+    """
+    График термов категории с отмеченным значением (кривые берутся из кэша diagnosis.curves).
+    """
+    if plt is None:
+        raise ImportError("Для графиков установите пакет matplotlib")
+    x_values, curves = diagnosis.curves(category)
+    memberships = diagnosis.memberships(category, value)
+    plt.figure(figsize=(10, 6))
+
+    for label, y_values, membership_value in zip(diagnosis.labels(category), curves.T, memberships):
+        plt.plot(x_values, y_values, label=label.capitalize())
+        # Если степень принадлежности ненулевая, выделяем точку
+        if membership_value > 0:
+            plt.plot(value, membership_value, 'ro')
+            plt.text(value, membership_value, f'({value}, {membership_value:.2f})', color='red')
+
+    plt.axvline(x=value, color='gray', linestyle='--', label=f'Введённое значение: {value}')
+    plt.title(f'Нечеткое множество: {category}')
+    plt.xlabel('Значение')
+    plt.ylabel('Степень принадлежности')
+    plt.legend()
+    plt.grid(True)
+    plt.show()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Пакетная нечеткая диагностика показаний пациентов")
+    parser.add_argument("readings", help="CSV-файл с показаниями (столбцы — категории, например 'Температура тела')")
+    parser.add_argument("--output", default=None, help="CSV-файл для результатов (по умолчанию — сводка на экран)")
+    parser.add_argument("--delimiter", default=",", help="Разделитель CSV")
+    args = parser.parse_args()
+
+    readings = read_readings(args.readings, delimiter=args.delimiter)
+    diagnosis = FuzzyDiagnosis()
+    results = diagnosis.screen(readings)
+    if args.output:
+        write_diagnoses(args.output, readings, results, delimiter=args.delimiter)
+    for category, result in results.items():
+        labels, counts = np.unique([label or "нет терма" for label in result["labels"]], return_counts=True)
+        print(f"{category}: " + ", ".join(f"{label} — {count}" for label, count in zip(labels, counts)))
+
+
+if __name__ == "__main__":
+    main()
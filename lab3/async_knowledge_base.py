@@ -0,0 +1,137 @@
+import time
+
+try:
+    from neo4j import AsyncGraphDatabase
+except ImportError:  # Драйвер нужен только для подключения к Neo4j
+    AsyncGraphDatabase = None
+
+from knowledge_base import (
+    ADVANCED_WATERING_QUERY,
+    ALL_RULES_QUERY,
+    BASIC_WATERING_QUERY,
+    PLANT_INFO_BATCH_QUERY,
+    PLANT_INFO_QUERY,
+    WATERING_BATCH_QUERY,
+    QUERY_NAMES,
+    plant_info_from_record,
+    record_query,
+)
+
+
+class AsyncNeo4jDB:
+    def __init__(self, uri, user, password, metrics=None, **driver_config):
+        """
+        Асинхронное подключение к Neo4j на основе neo4j.AsyncGraphDatabase.
+        Методы повторяют Neo4jDB, но являются корутинами; каждый запрос выполняется в своей сессии,
+        поэтому запросы можно выполнять параллельно (в пределах пула соединений драйвера).
+        :param uri: URI для подключения к Neo4j.
+        :param user: Имя пользователя.
+        :param password: Пароль.
+        :param metrics: Экземпляр Metrics для учёта времени и количества запросов; None — без учёта.
+        :param driver_config: Дополнительные настройки драйвера (например, max_connection_pool_size).
+        """
+        if AsyncGraphDatabase is None:
+            raise ImportError("Для подключения к Neo4j установите пакет neo4j")
+        self.driver = AsyncGraphDatabase.driver(uri, auth=(user, password), **driver_config)
+        self.rules_version = 0
+        self.metrics = metrics
+
+    async def close(self):
+        """
+        Закрытие подключения к базе данных.
+        """
+        await self.driver.close()
+
+    async def _read(self, query, **params):
+        """
+        Выполняет запрос на чтение в управляемой транзакции.
+        :param query: Текст Cypher-запроса.
+        :param params: Параметры запроса.
+        :return: Список записей в виде словарей.
+        """
+        async def work(tx):
+            result = await tx.run(query, **params)
+            return [record.data() async for record in result]
+
+        started = time.perf_counter()
+        try:
+            async with self.driver.session() as session:
+                records = await session.execute_read(work)
+        except Exception:
+            if self.metrics is not None:
+                self.metrics.increment("kb_query_errors_total", query=QUERY_NAMES.get(query, "other"))
+            raise
+        if self.metrics is not None:
+            record_query(self.metrics, query, time.perf_counter() - started, records)
+        return records
+
+    async def fetch_basic_watering(self, plant_type, fuzzified_humidity):
+        """
+        Получает базовые правила полива из базы данных.
+        :param plant_type: Тип растения.
+        :param fuzzified_humidity: Фаззифицированное значение влажности.
+        :return: Словарь с правилом и действием, либо None, если правило не найдено.
+        """
+        records = await self._read(BASIC_WATERING_QUERY, plant_type=plant_type,
+                                   fuzzified_humidity=fuzzified_humidity)
+        return records[0] if records else None
+
+    async def fetch_advanced_watering(self, plant_type, fuzzified_humidity, fuzzified_temperature, time_of_day):
+        """
+        Получает углубленные правила полива из базы данных.
+        :param plant_type: Тип растения.
+        :param fuzzified_humidity: Фаззифицированное значение влажности.
+        :param fuzzified_temperature: Фаззифицированное значение температуры.
+        :param time_of_day: Время суток.
+        :return: Словарь с правилом и действием, либо None, если правило не найдено.
+        """
+        records = await self._read(
+            ADVANCED_WATERING_QUERY,
+            plant_type=plant_type,
+            fuzzified_humidity=fuzzified_humidity,
+            fuzzified_temperature=fuzzified_temperature,
+            time_of_day=time_of_day,
+        )
+        return records[0] if records else None
+
+    async def fetch_watering_batch(self, states):
+        """
+        Получает базовые и углубленные правила полива для набора состояний одним запросом.
+        :param states: Список словарей с ключами plant_type, humidity_level, temperature, time_of_day.
+        :return: Список пар (базовое правило, углубленное правило) в порядке состояний.
+        """
+        results = [(None, None)] * len(states)
+        if not states:
+            return results
+        for record in await self._read(WATERING_BATCH_QUERY, states=states):
+            results[record["idx"]] = (record["basic_rule"], record["advanced_rule"])
+        return results
+
+    async def fetch_all_rules(self):
+        """
+        Выгружает все правила полива вместе с условиями и действиями.
+        :return: Список словарей с описанием правил.
+        """
+        return await self._read(ALL_RULES_QUERY)
+
+    async def get_plant_info(self, plant_name):
+        """
+        Ищет информацию о растении по имени.
+        :param plant_name: Название растения.
+        :return: Словарь с информацией о растении или None, если растение не найдено.
+        """
+        records = await self._read(PLANT_INFO_QUERY, plant_name=plant_name)
+        return plant_info_from_record(records[0]) if records else None
+
+    async def get_plant_info_batch(self, plant_names):
+        """
+        Ищет информацию о нескольких растениях одним запросом.
+        :param plant_names: Список уникальных названий.
+        :return: Словарь название -> информация о растении (None, если растение не найдено).
+        """
+        infos = dict.fromkeys(plant_names)
+        if plant_names:
+            for record in await self._read(PLANT_INFO_BATCH_QUERY, plant_names=list(plant_names)):
+                if infos.get(record["name"]) is None:
+                    infos[record["name"]] = plant_info_from_record(record)
+        return infos
@@ -0,0 +1,214 @@
+import argparse
+import itertools
+import json
+import logging
+import platform
+import random
+import sys
+import timeit
+
+from fuzzy_logic import TEMPERATURE_SETS, fuzzify_humidity, fuzzify_temperature, triangular_membership
+from greenhouse import Greenhouse
+from knowledge_base import PLANT_TYPES, WATERING_RULES
+from memory_db import InMemoryDB
+from rule_engine import RuleEngine
+
+PLANT_SCALES = [10, 100, 1000, 10000, 100000]  # Кривая масштабирования по числу растений
+TICK_SCALES = [1, 10, 100, 1000, 10000]  # Кривая масштабирования по числу тактов
+SIMULATION_TICKS = 40  # Бюджет тактов для кривой по растениям
+SIMULATION_PLANTS = 100  # Число растений для кривой по тактам
+SCALAR_CALLS = 1000  # Количество вызовов за одно измерение скалярных функций
+DEFAULT_THRESHOLD = 0.2  # Допустимое замедление относительно базовой линии (20%)
+
+ALL_PLANT_NAMES = [name for info in PLANT_TYPES.values() for name in info["plants"]] + ["Неизвестное"]
+
+
+def stub_db():
+    """
+    Локальная база знаний из WATERING_RULES и PLANT_TYPES: замеры не зависят от сети.
+    """
+    return InMemoryDB(PLANT_TYPES, WATERING_RULES)
+
+
+def _plant_names(count):
+    """Названия растений всех категорий по кругу (включая неизвестное растение)."""
+    return list(itertools.islice(itertools.cycle(ALL_PLANT_NAMES), count))
+
+
+def _samples(count, low, high, seed=0):
+    """Воспроизводимые случайные значения для скалярных замеров."""
+    rng = random.Random(seed)
+    return [rng.uniform(low, high) for _ in range(count)]
+
+
+def bench_triangular_membership():
+    left, peak, right = TEMPERATURE_SETS["Средняя"]
+    values = _samples(SCALAR_CALLS, -10, 40)
+
+    def run():
+        for value in values:
+            triangular_membership(value, left, peak, right)
+    return run, SCALAR_CALLS
+
+
+def bench_fuzzify_temperature():
+    values = _samples(SCALAR_CALLS, -10, 40)
+
+    def run():
+        for value in values:
+            fuzzify_temperature(value)
+    return run, SCALAR_CALLS
+
+
+def bench_fuzzify_humidity():
+    values = _samples(SCALAR_CALLS, 0, 100)
+
+    def run():
+        for value in values:
+            fuzzify_humidity(value)
+    return run, SCALAR_CALLS
+
+
+def bench_process_watering(use_index=False, cache_decisions=False):
+    engine = RuleEngine(stub_db(), use_index=use_index, cache_decisions=cache_decisions)
+    plant_types = list(PLANT_TYPES) + ["Другие растения"]
+    rng = random.Random(0)
+    states = [
+        (rng.choice(plant_types), rng.randint(5, 35), rng.uniform(0, 100), rng.choice(["Утро", "День", "Вечер", "Ночь"]))
+        for _ in range(SCALAR_CALLS)
+    ]
+
+    def run():
+        for state in states:
+            engine.process_watering(*state)
+    return run, SCALAR_CALLS
+
+
+def bench_simulation(plants, ticks, inference="crisp", event_driven=False):
+    """
+    Замер headless-симуляции: plants растений, ровно ticks тактов.
+    Время роста растягивается на весь бюджет, чтобы растения не выросли раньше.
+    :param event_driven: Замерять событийную симуляцию (run_simulation_events).
+    """
+    db = stub_db()
+    names = _plant_names(plants)
+
+    def run():
+        random.seed(0)
+        greenhouse = Greenhouse(db, names, use_rule_index=True, inference=inference)
+        greenhouse.store.growth_days[:greenhouse.store.size] = ticks // 4 + 1
+        if event_driven:
+            greenhouse.run_simulation_events(max_ticks=ticks, history=False)
+        else:
+            greenhouse.run_simulation(headless=True, max_ticks=ticks, history=False)
+    return run, 1
+
+
+def benchmark_cases(quick=False):
+    """
+    Список замеров: название -> фабрика (функция, возвращающая (замеряемая функция, число операций)).
+    :param quick: Ограничить кривые масштабирования меньшими размерами.
+    """
+    plant_scales = PLANT_SCALES[:3] if quick else PLANT_SCALES
+    tick_scales = TICK_SCALES[:3] if quick else TICK_SCALES
+    cases = {
+        "triangular_membership": bench_triangular_membership,
+        "fuzzify_temperature": bench_fuzzify_temperature,
+        "fuzzify_humidity": bench_fuzzify_humidity,
+        "process_watering": lambda: bench_process_watering(),
+        "process_watering[index]": lambda: bench_process_watering(use_index=True),
+        "process_watering[index+cache]": lambda: bench_process_watering(use_index=True, cache_decisions=True),
+    }
+    for plants in plant_scales:
+        cases[f"run_simulation[plants={plants}]"] = (
+            lambda plants=plants: bench_simulation(plants, SIMULATION_TICKS))
+    for ticks in tick_scales:
+        cases[f"run_simulation[ticks={ticks}]"] = (
+            lambda ticks=ticks: bench_simulation(SIMULATION_PLANTS, ticks))
+        cases[f"run_simulation_events[ticks={ticks}]"] = (
+            lambda ticks=ticks: bench_simulation(SIMULATION_PLANTS, ticks, event_driven=True))
+    return cases
+
+
+def measure(factory, repeat=5, min_time=0.2):
+    """
+    Замеряет функцию через timeit: число запусков подбирается автоматически,
+    результат — лучшее из repeat измерений.
+    :return: Словарь со временем одного запуска и одной операции в секундах.
+    """
+    function, operations = factory()
+    timer = timeit.Timer(function)
+    number, elapsed = timer.autorange()
+    if elapsed < min_time:
+        number = max(1, int(number * min_time / max(elapsed, 1e-9)))
+    best = min(timer.repeat(repeat=repeat, number=number)) / number
+    return {"seconds": best, "per_op": best / operations, "number": number}
+
+
+def run_benchmarks(pattern=None, quick=False, repeat=5):
+    """
+    Выполняет замеры.
+    :param pattern: Подстрока для отбора замеров по названию; None — все.
+    :param quick: Сокращённые кривые масштабирования.
+    :param repeat: Количество повторов каждого замера.
+    :return: Словарь название -> результат measure.
+    """
+    results = {}
+    for name, factory in benchmark_cases(quick).items():
+        if pattern and pattern not in name:
+            continue
+        results[name] = measure(factory, repeat=repeat)
+        print(f"{name:40s} {results[name]['seconds'] * 1e3:12.3f} мс  ({results[name]['per_op'] * 1e6:.3f} мкс/оп)",
+              file=sys.stderr)
+    return results
+
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """
+    Сравнивает результаты с базовой линией.
+    :param threshold: Допустимое относительное замедление.
+    :return: Список строк (название, базовое время, текущее время, отношение) для регрессий.
+    """
+    regressions = []
+    for name, result in results.items():
+        reference = baseline.get("results", {}).get(name)
+        if reference is None:
+            continue
+        ratio = result["seconds"] / reference["seconds"]
+        if ratio > 1 + threshold:
+            regressions.append((name, reference["seconds"], result["seconds"], ratio))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Замеры производительности lab3 на локальной базе знаний")
+    parser.add_argument("-k", dest="pattern", default=None, help="Запускать только замеры, содержащие подстроку")
+    parser.add_argument("--quick", action="store_true", help="Сокращённые кривые масштабирования")
+    parser.add_argument("--repeat", type=int, default=5, help="Количество повторов каждого замера")
+    parser.add_argument("--save", default=None, help="Сохранить результаты как базовую линию (JSON)")
+    parser.add_argument("--compare", default=None, help="Сравнить с базовой линией (JSON)")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Допустимое замедление относительно базовой линии (доля)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    results = run_benchmarks(args.pattern, quick=args.quick, repeat=args.repeat)
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as file:
+            json.dump({"python": platform.python_version(), "machine": platform.machine(), "results": results},
+                      file, ensure_ascii=False, indent=2)
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as file:
+            baseline = json.load(file)
+        regressions = compare(results, baseline, args.threshold)
+        for name, before, after, ratio in regressions:
+            print(f"Регрессия {name}: {before * 1e3:.3f} мс -> {after * 1e3:.3f} мс (x{ratio:.2f})")
+        if regressions:
+            sys.exit(1)
+        print("Регрессий нет.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+import time
+from collections import OrderedDict
+
+MISSING = object()  # Отличает отсутствие записи от закэшированного None
+
+
+class LRUCache:
+    def __init__(self, maxsize=1024, ttl=None, clock=time.monotonic):
+        """
+        Ограниченный по размеру кэш с вытеснением давно не использованных записей (LRU)
+        и необязательным временем жизни записей.
+        :param maxsize: Максимальное количество записей; None — без ограничения.
+        :param ttl: Время жизни записи в секундах; None — записи не устаревают.
+        :param clock: Источник времени (для тестирования можно подменить).
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self._data = OrderedDict()  # Ключ -> (значение, момент устаревания)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return self._lookup(key) is not MISSING
+
+    def _lookup(self, key):
+        """
+        Ищет запись без учёта статистики, удаляя её, если она устарела.
+        """
+        entry = self._data.get(key, MISSING)
+        if entry is MISSING:
+            return MISSING
+        value, expires = entry
+        if expires is not None and expires <= self.clock():
+            del self._data[key]
+            self.expirations += 1
+            return MISSING
+        return value
+
+    def get(self, key, default=MISSING):
+        """
+        Возвращает значение из кэша.
+        :param key: Ключ.
+        :param default: Значение при отсутствии записи (по умолчанию MISSING).
+        :return: Закэшированное значение (может быть None) или default.
+        """
+        value = self._lookup(key)
+        if value is MISSING:
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        """
+        Сохраняет значение в кэше, вытесняя самую старую запись при переполнении.
+        :param key: Ключ.
+        :param value: Значение (None тоже кэшируется).
+        """
+        expires = self.clock() + self.ttl if self.ttl is not None else None
+        self._data[key] = (value, expires)
+        self._data.move_to_end(key)
+        if self.maxsize is not None:
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key=MISSING):
+        """
+        Удаляет запись по ключу или, если ключ не указан, очищает весь кэш.
+        """
+        if key is MISSING:
+            self._data.clear()
+        else:
+            self._data.pop(key, None)
+
+    def stats(self):
+        """
+        :return: Словарь со статистикой использования кэша.
+        """
+        requests = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / requests if requests else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
@@ -0,0 +1,252 @@
+import json
+import os
+import random
+
+import numpy as np
+
+from greenhouse import Greenhouse, Sensor
+from plant_store import PlantStore
+from simulation_result import TIME_CYCLE
+
+STORE_FIELDS = ("humidity", "current_days", "growth_days", "plant_type", "zone", "alive")
+
+
+def elapsed_ticks(greenhouse):
+    """
+    Количество тактов, прошедших с начала симуляции (день 0, утро), по дню и времени суток.
+    """
+    return greenhouse.day_count * len(TIME_CYCLE) + TIME_CYCLE.index(greenhouse.time_of_day) - 1
+
+
+def _random_state():
+    """Состояние генератора random в виде массивов (без pickle)."""
+    version, internal, gauss = random.getstate()
+    return {
+        "rng_version": np.array(version),
+        "rng_internal": np.array(internal, dtype=np.int64),
+        "rng_gauss": np.array(np.nan if gauss is None else gauss),
+    }
+
+
+def _set_random_state(snapshot):
+    gauss = float(snapshot["rng_gauss"])
+    random.setstate((
+        int(snapshot["rng_version"]),
+        tuple(int(value) for value in snapshot["rng_internal"]),
+        None if np.isnan(gauss) else gauss,
+    ))
+
+
+def save_checkpoint(greenhouse, path, history_ticks=0):
+    """
+    Сохраняет состояние теплицы в сжатый файл .npz: массивы хранилища растений,
+    названия, день, время суток, состояние генератора random и, если датчик
+    использует numpy.random.Generator, состояние его генератора.
+    Файл записывается во временный и затем атомарно заменяет прежний снимок.
+    :param greenhouse: Теплица.
+    :param path: Путь к снимку.
+    :param history_ticks: Количество тактов, уже записанных в файл истории (для продолжения записи).
+    """
+    store = greenhouse.store
+    arrays = {field: getattr(store, field)[:store.size] for field in STORE_FIELDS}
+    arrays.update(_random_state())
+    get_state = getattr(greenhouse.sensor, "get_state", None)
+    sensor_state = get_state() if get_state is not None else None
+    if sensor_state is not None:
+        arrays["sensor_state"] = np.array(json.dumps(sensor_state))
+    temporary = path + ".tmp"
+    with open(temporary, "wb") as file:
+        np.savez_compressed(
+            file,
+            names=np.array(store.names, dtype=str),
+            type_names=np.array(store.type_names, dtype=str),
+            zone_names=np.array(store.zone_names, dtype=str),
+            day_count=np.array(greenhouse.day_count),
+            time_of_day=np.array(greenhouse.time_of_day),
+            history_ticks=np.array(history_ticks),
+            **arrays,
+        )
+    os.replace(temporary, path)
+
+
+def read_checkpoint(path):
+    """
+    Читает снимок без создания теплицы (например, для анализа состояния).
+    :return: Словарь массивов снимка.
+    """
+    with np.load(path) as snapshot:
+        return {key: snapshot[key] for key in snapshot.files}
+
+
+def load_checkpoint(path, db, restore_random=True, **greenhouse_options):
+    """
+    Восстанавливает теплицу из снимка.
+    :param path: Путь к снимку.
+    :param db: База знаний.
+    :param restore_random: Восстановить состояние генераторов random и датчика; False — продолжить
+                           с текущим состоянием (ответвление сценария «что если»).
+    :param greenhouse_options: Дополнительные аргументы Greenhouse (use_rule_index, inference и т. д.).
+    :return: Кортеж (теплица, количество тактов в файле истории на момент снимка).
+    """
+    snapshot = read_checkpoint(path)
+    greenhouse = Greenhouse(db, [], **greenhouse_options)
+
+    store = PlantStore(max(len(snapshot["names"]), 1))
+    size = len(snapshot["names"])
+    for field in STORE_FIELDS:
+        getattr(store, field)[:size] = snapshot[field]
+    store.size = size
+    store.names = snapshot["names"].tolist()
+    for type_name in snapshot["type_names"].tolist():
+        store.type_code(type_name)
+    for zone_name in snapshot["zone_names"].tolist():
+        store.zone_code(zone_name)
+
+    greenhouse.store = store
+    greenhouse.day_count = int(snapshot["day_count"])
+    greenhouse.time_of_day = str(snapshot["time_of_day"])
+    if restore_random:
+        _set_random_state(snapshot)
+        if "sensor_state" in snapshot and greenhouse_options.get("sensor") is None:
+            greenhouse.sensor = Sensor.from_state(json.loads(str(snapshot["sensor_state"])))
+    return greenhouse, int(snapshot["history_ticks"])
+
+
+def history_dtype(plant_count):
+    """
+    Формат записи одного такта в файле истории.
+    """
+    return np.dtype([
+        ("tick", np.int64),
+        ("day", np.int64),
+        ("time_of_day", np.int8),
+        ("temperature", np.float64),
+        ("watering_total", np.float64),
+        ("humidity", np.float64, (plant_count,)),
+        ("watering", np.float64, (plant_count,)),
+    ])
+
+
+class HistoryWriter:
+    def __init__(self, path, plant_names, resume_ticks=None):
+        """
+        Файл истории тактов: записи фиксированного размера дописываются в конец,
+        поэтому файл можно открыть через np.memmap (read_history) во время и после симуляции.
+        Рядом сохраняется описание формата (<path>.json).
+        :param path: Путь к файлу истории.
+        :param plant_names: Названия растений (столбцы рядов влажности и полива).
+        :param resume_ticks: Продолжить запись после этого количества тактов, отбросив
+                             записи, сделанные после последнего снимка; None — начать заново.
+        """
+        self.path = path
+        self.dtype = history_dtype(len(plant_names))
+        with open(path + ".json", "w", encoding="utf-8") as file:
+            json.dump({"plants": len(plant_names), "names": list(plant_names)}, file, ensure_ascii=False)
+
+        if resume_ticks is None:
+            self._file = open(path, "wb")
+            self.ticks = 0
+        else:
+            self._file = open(path, "r+b" if os.path.exists(path) else "wb")
+            self._file.truncate(resume_ticks * self.dtype.itemsize)
+            self._file.seek(0, os.SEEK_END)
+            self.ticks = resume_ticks
+        self._record = np.zeros(1, dtype=self.dtype)
+
+    def append(self, tick, day, time_of_day, temperature, watering_total, indices, humidity, watering):
+        """
+        Дописывает такт.
+        :param indices: Индексы растений, обработанных на такте; у остальных — NaN.
+        """
+        record = self._record
+        record["tick"] = tick
+        record["day"] = day
+        record["time_of_day"] = time_of_day
+        record["temperature"] = temperature
+        record["watering_total"] = watering_total
+        record["humidity"] = np.nan
+        record["watering"] = np.nan
+        record["humidity"][0, indices] = humidity
+        record["watering"][0, indices] = watering
+        self._file.write(self._record.tobytes())
+        self.ticks += 1
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+def read_history(path):
+    """
+    Открывает файл истории только для чтения без загрузки в память.
+    :return: Структурированный np.memmap с полями tick, day, time_of_day, temperature,
+             watering_total, humidity, watering.
+    """
+    with open(path + ".json", "r", encoding="utf-8") as file:
+        plant_count = json.load(file)["plants"]
+    dtype = history_dtype(plant_count)
+    if os.path.getsize(path) < dtype.itemsize:
+        return np.zeros(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="r", shape=(os.path.getsize(path) // dtype.itemsize,))
+
+
+class Checkpointer:
+    def __init__(self, path, every=1000, history_path=None, resume_ticks=None):
+        """
+        Периодическое сохранение снимков и запись истории тактов во время run_simulation.
+        :param path: Путь к снимку .npz.
+        :param every: Сохранять снимок каждые every тактов (и в конце симуляции).
+        :param history_path: Файл истории тактов; None — история не пишется.
+        :param resume_ticks: Количество тактов в истории на момент восстановленного снимка
+                             (второе значение load_checkpoint); None — новая история.
+        """
+        self.path = path
+        self.every = every
+        self.history_path = history_path
+        self.resume_ticks = resume_ticks
+        self.history = None
+        self._since_save = 0
+
+    def after_tick(self, greenhouse, result, indices, watering):
+        """
+        Вызывается после завершения такта (полив записан, время суток сменилось).
+        """
+        if self.history_path is not None:
+            if self.history is None:
+                self.history = HistoryWriter(self.history_path, greenhouse.store.names, self.resume_ticks)
+            tick = result.ticks - 1
+            self.history.append(
+                elapsed_ticks(greenhouse) - 1,
+                result.day[tick],
+                result.time_of_day[tick],
+                result.temperature[tick],
+                result.watering_total[tick],
+                indices,
+                greenhouse.store.humidity[indices],
+                watering,
+            )
+        self._since_save += 1
+        if self._since_save >= self.every:
+            self.save(greenhouse)
+
+    def save(self, greenhouse):
+        """
+        Сохраняет снимок (история предварительно сбрасывается на диск).
+        """
+        history_ticks = self.resume_ticks or 0
+        if self.history is not None:
+            self.history.flush()
+            history_ticks = self.history.ticks
+        save_checkpoint(greenhouse, self.path, history_ticks)
+        self._since_save = 0
+
+    def finish(self, greenhouse):
+        """
+        Сохраняет итоговый снимок и закрывает файл истории.
+        """
+        self.save(greenhouse)
+        if self.history is not None:
+            self.history.close()
+            self.history = None
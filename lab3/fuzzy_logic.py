@@ -1,3 +1,42 @@
+import json
+
+import numpy as np
+
+# Термы лингвистических переменных: метка -> (левая граница, пик, правая граница)
+TEMPERATURE_SETS = {
+    "Низкая": (0, 10, 15),
+    "Средняя": (15, 20, 25),
+    "Высокая": (25, 30, 40)
+}
+
+HUMIDITY_SETS = {
+    "Низкая": (0, 30, 40),
+    "Средняя": (40, 55, 70),
+    "Высокая": (70, 85, 100)
+}
+
+WATERING_LEVELS = {
+    "Полив минимальный": (0, 5, 10),
+    "Полив умеренный": (10, 15, 20),
+    "Полив сильный": (20, 25, 30)
+}
+
+# Уменьшение влажности для каждой метки температуры
+HUMIDITY_DECREASE = {
+    "Низкая": 5,
+    "Средняя": 10,
+    "Высокая": 15
+}
+
+# Конфигурация лингвистических переменных по умолчанию.
+# universe — диапазон целых значений, для которого заранее строятся таблицы поиска.
+DEFAULT_FUZZY_CONFIG = {
+    "Температура": {"universe": (-50, 60), "terms": TEMPERATURE_SETS},
+    "Влажность": {"universe": (0, 100), "terms": HUMIDITY_SETS},
+    "Полив": {"universe": (0, 30), "terms": WATERING_LEVELS}
+}
+
+
 def triangular_membership(value, left, peak, right):
     """
     Треугольная функция принадлежности.
@@ -14,6 +53,186 @@ def triangular_membership(value, left, peak, right):
     return 0
 
 
+def triangular_membership_array(values, left, peak, right):
+    """
+    Треугольная функция принадлежности для массива значений.
+    :param values: Массив проверяемых значений.
+    :param left: Левая граница треугольника.
+    :param peak: Пик треугольника.
+    :param right: Правая граница треугольника.
+    :return: Массив степеней принадлежности от 0 до 1 (для NaN — 0).
+    """
+    values = np.asarray(values, dtype=float)
+    rising = (left <= values) & (values <= peak)
+    falling = (peak < values) & (values <= right)
+    # Ветви np.where вычисляются для всех значений, в том числе при вырожденном треугольнике
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(rising, (values - left) / (peak - left),
+                        np.where(falling, (right - values) / (right - peak), 0.0))
+
+
+class LinguisticVariable:
+    def __init__(self, name, terms, universe=None):
+        """
+        Лингвистическая переменная с треугольными термами.
+        Для целых значений из universe заранее строятся таблицы принадлежностей и меток,
+        поэтому фаззификация сводится к обращению по индексу.
+        :param name: Название переменной.
+        :param terms: Словарь термов: метка -> (левая граница, пик, правая граница).
+        :param universe: Кортеж (минимум, максимум) целых значений для таблиц поиска; None — без таблиц.
+        """
+        self.name = name
+        self.terms = {label: tuple(params) for label, params in terms.items()}
+        self.labels = tuple(self.terms)
+        self.universe = tuple(universe) if universe is not None else None
+        self._membership_table = None
+        self._label_table = None
+        if self.universe is not None:
+            low, high = self.universe
+            self._membership_table, codes = self._compute_array(np.arange(low, high + 1))
+            self._label_table = [self.labels[code] for code in codes]
+
+    def _compute_array(self, values):
+        """
+        Вычисляет принадлежности массива значений без таблиц поиска.
+        :param values: Массив значений.
+        :return: Кортеж (матрица принадлежностей, коды меток с максимальной принадлежностью).
+        """
+        memberships = np.stack(
+            [triangular_membership_array(values, *params) for params in self.terms.values()], axis=-1
+        )
+        # argmax, как и max по словарю, при равенстве выбирает первую метку
+        return memberships, memberships.argmax(axis=-1)
+
+    def _table_index(self, value):
+        """
+        Возвращает индекс значения в таблицах поиска или None, если значение не табулировано.
+        """
+        if self.universe is None or not self.universe[0] <= value <= self.universe[1]:
+            return None
+        index = int(value)
+        if index != value:
+            return None
+        return index - self.universe[0]
+
+    def memberships(self, value):
+        """
+        Степени принадлежности значения ко всем термам.
+        :param value: Значение переменной.
+        :return: Словарь метка -> степень принадлежности.
+        """
+        index = self._table_index(value)
+        if index is not None:
+            return dict(zip(self.labels, self._membership_table[index].tolist()))
+        return {label: triangular_membership(value, *params) for label, params in self.terms.items()}
+
+    def fuzzify(self, value):
+        """
+        Фаззификация значения.
+        :param value: Значение переменной.
+        :return: Метка с максимальной степенью принадлежности.
+        """
+        index = self._table_index(value)
+        if index is not None:
+            return self._label_table[index]
+        memberships = self.memberships(value)
+        return max(memberships, key=memberships.get)
+
+    def breakpoints(self):
+        """
+        Точки, в которых может смениться метка с максимальной принадлежностью:
+        параметры термов и точки пересечения их сторон. Между соседними точками
+        все принадлежности линейны, поэтому метка на открытом интервале постоянна.
+        :return: Отсортированный массив точек.
+        """
+        points = sorted({float(point) for params in self.terms.values() for point in params})
+        crossings = []
+        for low, high in zip(points, points[1:]):
+            # Коэффициенты линейных участков на интервале по двум внутренним точкам
+            inner = np.array([low + (high - low) / 3, low + 2 * (high - low) / 3])
+            memberships, _ = self._compute_array(inner)
+            slopes = (memberships[1] - memberships[0]) / (inner[1] - inner[0])
+            intercepts = memberships[0] - slopes * inner[0]
+            for first in range(len(self.labels)):
+                for second in range(first + 1, len(self.labels)):
+                    if np.isclose(slopes[first], slopes[second]):
+                        continue
+                    point = (intercepts[second] - intercepts[first]) / (slopes[first] - slopes[second])
+                    if low < point < high and not np.isclose(point, low) and not np.isclose(point, high):
+                        crossings.append(float(point))
+        return np.array(sorted(set(points) | set(crossings)))
+
+    def memberships_array(self, values):
+        """
+        Фаззификация массива значений.
+        :param values: Массив значений.
+        :return: Кортеж (матрица принадлежностей n x число термов, коды меток в self.labels).
+        """
+        values = np.asarray(values)
+        if self.universe is not None and values.size:
+            low, high = self.universe
+            integral = np.issubdtype(values.dtype, np.integer) or bool(np.all(values == np.floor(values)))
+            if integral and low <= values.min() and values.max() <= high:
+                indices = values.astype(np.int64) - low
+                memberships = self._membership_table[indices]
+                return memberships, memberships.argmax(axis=-1)
+        return self._compute_array(values)
+
+
+class FuzzyRegistry:
+    def __init__(self):
+        """
+        Реестр лингвистических переменных.
+        """
+        self._variables = {}
+
+    def register(self, variable):
+        """
+        Добавляет переменную в реестр (переменная с тем же именем заменяется).
+        :param variable: Экземпляр LinguisticVariable.
+        :return: Зарегистрированная переменная.
+        """
+        self._variables[variable.name] = variable
+        return variable
+
+    def __getitem__(self, name):
+        return self._variables[name]
+
+    def __contains__(self, name):
+        return name in self._variables
+
+    def names(self):
+        """
+        :return: Список имён зарегистрированных переменных.
+        """
+        return list(self._variables)
+
+    def load_config(self, config):
+        """
+        Регистрирует переменные из конфигурации.
+        Описание переменной — либо словарь {"universe": (мин, макс), "terms": {...}},
+        либо сразу словарь термов (как fuzzy_sets в lab2), тогда таблицы поиска не строятся.
+        :param config: Словарь: имя переменной -> описание.
+        """
+        for name, description in config.items():
+            if "terms" in description:
+                self.register(LinguisticVariable(name, description["terms"], description.get("universe")))
+            else:
+                self.register(LinguisticVariable(name, description))
+
+    def load_json(self, path):
+        """
+        Регистрирует переменные из JSON-файла в формате load_config.
+        :param path: Путь к файлу.
+        """
+        with open(path, "r", encoding="utf-8") as file:
+            self.load_config(json.load(file))
+
+
+FUZZY_REGISTRY = FuzzyRegistry()
+FUZZY_REGISTRY.load_config(DEFAULT_FUZZY_CONFIG)
+
+
 def calculate_humidity_decrease(temperature):
     """
     Рассчитывает уменьшение влажности на основе температуры с использованием треугольной функции принадлежности.
@@ -21,13 +240,7 @@ def calculate_humidity_decrease(temperature):
     :return: Значение уменьшения влажности.
     """
     temp_fuzzy = fuzzify_temperature(temperature)  # Получаем строку: "Низкая", "Средняя", "Высокая"
-    if temp_fuzzy == "Низкая":
-        return 5  # Уменьшение для низкой температуры
-    elif temp_fuzzy == "Средняя":
-        return 10  # Уменьшение для средней температуры
-    elif temp_fuzzy == "Высокая":
-        return 15  # Уменьшение для высокой температуры
-    return 0  # На случай непредвиденных ситуаций
+    return HUMIDITY_DECREASE.get(temp_fuzzy, 0)  # 0 — на случай непредвиденных ситуаций
 
 
 
@@ -38,12 +251,7 @@ def fuzzify_temperature(value):
     :param value: Температура (int).
     :return: Строка, соответствующая максимальной степени принадлежности.
     """
-    memberships = {
-        "Низкая": triangular_membership(value, 0, 10, 15),
-        "Средняя": triangular_membership(value, 15, 20, 25),
-        "Высокая": triangular_membership(value, 25, 30, 40)
-    }
-    return max(memberships, key=memberships.get)
+    return FUZZY_REGISTRY["Температура"].fuzzify(value)
 
 
 
@@ -55,12 +263,7 @@ def fuzzify_humidity(value):
     :param value: Влажность (int).
     :return: Строка, соответствующая максимальной степени принадлежности.
     """
-    memberships = {
-        "Низкая": triangular_membership(value, 0, 30, 40),
-        "Средняя": triangular_membership(value, 40, 55, 70),
-        "Высокая": triangular_membership(value, 70, 85, 100)
-    }
-    return max(memberships, key=memberships.get)
+    return FUZZY_REGISTRY["Влажность"].fuzzify(value)
 
 
 
@@ -70,12 +273,55 @@ def defuzzify_watering(level):
     :param level: Уровень полива (строка).
     :return: Числовое значение полива.
     """
-    watering_levels = {
-        "Полив минимальный": (0, 5, 10),
-        "Полив умеренный": (10, 15, 20),
-        "Полив сильный": (20, 25, 30)
-    }
+    watering_levels = FUZZY_REGISTRY["Полив"].terms
     if level in watering_levels:
         left, peak, right = watering_levels[level]
         return triangular_membership(peak, left, peak, right) * peak
     return 0
+
+
+def fuzzify_temperature_array(values):
+    """
+    Фаззификация массива температур.
+    :param values: Массив температур.
+    :return: Кортеж (матрица принадлежностей, коды меток в FUZZY_REGISTRY["Температура"].labels).
+    """
+    return FUZZY_REGISTRY["Температура"].memberships_array(values)
+
+
+def fuzzify_humidity_array(values):
+    """
+    Фаззификация массива значений влажности.
+    :param values: Массив значений влажности.
+    :return: Кортеж (матрица принадлежностей, коды меток в FUZZY_REGISTRY["Влажность"].labels).
+    """
+    return FUZZY_REGISTRY["Влажность"].memberships_array(values)
+
+
+def calculate_humidity_decrease_array(temperatures):
+    """
+    Рассчитывает уменьшение влажности для массива температур.
+    Таблица уменьшений строится по текущим меткам реестра: переменная может быть
+    перезагружена из конфигурации с другим порядком термов.
+    :param temperatures: Массив температур.
+    :return: Массив значений уменьшения влажности.
+    """
+    variable = FUZZY_REGISTRY["Температура"]
+    _, codes = variable.memberships_array(temperatures)
+    decreases = np.array([HUMIDITY_DECREASE.get(label, 0) for label in variable.labels])
+    return decreases[codes]
+
+
+def defuzzify_watering_array(levels):
+    """
+    Дефаззификация массива действий полива.
+    Каждая уникальная метка дефаззифицируется один раз.
+    :param levels: Массив уровней полива (строки).
+    :return: Массив числовых значений полива.
+    """
+    levels = np.asarray(levels)
+    if levels.size == 0:
+        return np.zeros(levels.shape)
+    unique_levels, inverse = np.unique(levels, return_inverse=True)
+    values = np.array([defuzzify_watering(level) for level in unique_levels], dtype=float)
+    return values[inverse].reshape(levels.shape)
@@ -1,115 +1,450 @@
+import asyncio
+import logging
 import random
 import time
-import random
 
-from fuzzy_logic import calculate_humidity_decrease
+import numpy as np
+
+from fuzzy_logic import (
+    FUZZY_REGISTRY,
+    calculate_humidity_decrease,
+    calculate_humidity_decrease_array,
+    fuzzify_humidity_array,
+    fuzzify_temperature_array,
+)
+from ingestion import SensorStreamEnded
+from metrics import timed
+from plant_info import PlantInfoResolver
+from plant_store import DEFAULT_ZONE, Plant, PlantStore
 from rule_engine import RuleEngine
+from scheduler import EventScheduler
+from simulation_result import SimulationResult, TIME_CYCLE
+
+logger = logging.getLogger(__name__)
+
+
+def spawn_generators(seed, count):
+    """
+    Независимые генераторы для параллельных симуляций: потоки порождаются из одного
+    SeedSequence, поэтому результаты не зависят от распределения теплиц по процессам.
+    :param seed: Начальное значение (int, SeedSequence или None).
+    :param count: Количество генераторов.
+    :return: Список numpy.random.Generator.
+    """
+    sequence = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+    return [np.random.default_rng(child) for child in sequence.spawn(count)]
 
 
 class Sensor:
+    def __init__(self, rng=None, block=len(TIME_CYCLE)):
+        """
+        Датчик температуры.
+        :param rng: numpy.random.Generator (или зерно для него); температуры генерируются
+                    пачками по block значений. None — модуль random, по одному значению за такт.
+        :param block: Размер пачки (по умолчанию — такты одних суток).
+        """
+        self.rng = rng if rng is None or isinstance(rng, np.random.Generator) else np.random.default_rng(rng)
+        self.block = block
+        self._buffer = np.empty(0, dtype=np.int64)  # Сгенерированные, но ещё не выданные температуры
+        self._position = 0
+
+    def _draw(self, count):
+        """Выдаёт count температур из пачек генератора."""
+        available = len(self._buffer) - self._position
+        if available < count:
+            blocks = -(-(count - available) // self.block)
+            self._buffer = np.concatenate((
+                self._buffer[self._position:],
+                self.rng.integers(5, 36, size=blocks * self.block),
+            ))
+            self._position = 0
+        values = self._buffer[self._position:self._position + count]
+        self._position += count
+        return values
+
     def generate_temperature(self):
         """Генерация температуры"""
-        return random.randint(5, 35)
+        if self.rng is None:
+            return random.randint(5, 35)
+        return int(self._draw(1)[0])
 
+    def generate_temperatures(self, count):
+        """
+        Генерация температур для count тактов подряд (та же последовательность,
+        что и при count вызовах generate_temperature).
+        """
+        if self.rng is None:
+            return np.array([random.randint(5, 35) for _ in range(count)])
+        return self._draw(count).copy()
 
-class Plant:
-    def __init__(self, name, plant_type, growth_days):
-        self.name = name
-        self.plant_type = plant_type
-        self.growth_days = growth_days
-        self.current_days = 0
-        self.humidity = 100  # Начальная влажность 0%
+    def read_zones(self, zone_names):
+        """
+        Показания датчиков зон за такт: одна сгенерированная температура для всей теплицы.
+        :param zone_names: Названия зон.
+        :return: Массив температур по зонам.
+        """
+        return np.full(len(zone_names), self.generate_temperature())
 
-    def grow(self):
-        """Увеличивает количество дней роста."""
-        self.current_days += 1
-        return self.current_days >= self.growth_days
+    def read_ticks(self, zone_names, count):
+        """
+        Показания датчиков зон сразу для count тактов.
+        :return: Матрица такты x зоны.
+        """
+        return np.repeat(self.generate_temperatures(count)[:, None], len(zone_names), axis=1)
 
-    def update_humidity(self, temperature):
+    def get_state(self):
         """
-        Уменьшает влажность, используя фаззификацию температуры.
-        :param temperature: Текущая температура в теплице.
+        Состояние генератора и невыданных температур для снимка; None для модуля random.
         """
-        humidity_decrease = calculate_humidity_decrease(temperature)
-        self.humidity = max(0, self.humidity - humidity_decrease)  # Влажность не может быть отрицательной
+        if self.rng is None:
+            return None
+        return {"bit_generator": self.rng.bit_generator.state, "block": self.block,
+                "pending": self._buffer[self._position:].tolist()}
+
+    @classmethod
+    def from_state(cls, state):
+        """Восстанавливает датчик из get_state."""
+        if state is None:
+            return cls()
+        bit_generator = getattr(np.random, state["bit_generator"]["bit_generator"])()
+        bit_generator.state = state["bit_generator"]
+        sensor = cls(np.random.Generator(bit_generator), block=state["block"])
+        sensor._buffer = np.array(state["pending"], dtype=np.int64)
+        return sensor
 
 
 class Greenhouse:
-    def __init__(self, db, plant_names):
+    def __init__(self, db, plant_names, use_rule_index=False, inference="crisp", plant_info=None,
+                 cache_decisions=False, metrics=None, sensor=None, plant_zones=None, rng=None):
         self.db = db
-        self.sensor = Sensor()
-        self.rule_engine = RuleEngine(db)
-        self.plants = self._initialize_plants(plant_names)
+        # Например, StreamSensor для воспроизведения записанных показаний;
+        # rng — numpy.random.Generator или зерно для датчика по умолчанию
+        self.sensor = sensor or Sensor(rng)
+        self.metrics = metrics  # Время тактов и этапов; None — без учёта
+        self.rule_engine = RuleEngine(db, use_index=use_rule_index, inference=inference,
+                                      cache_decisions=cache_decisions, metrics=metrics)
+        self.plant_info = plant_info or PlantInfoResolver(db)  # Можно передать общий кэш для нескольких теплиц
+        self.store = PlantStore(max(len(plant_names), 1))
+        self._initialize_plants(plant_names, plant_zones)
         self.day_count = 0
         self.time_of_day = "утро"
 
-    def _initialize_plants(self, plant_names):
-        """Создаёт объекты растений на основе ввода."""
-        plants = []
-        for name in plant_names:
-            info = self.db.get_plant_info(name)
-            if info:
-                print(f"Растение '{info['name']}' отнесено к категории '{info['category']}', "
-                      f"время роста: {info['growth_time_days']} дней.")
-                plants.append(Plant(name, info["category"], info["growth_time_days"]))
-            else:
-                print(f"Растение '{name}' не найдено в базе знаний.")
-                plants.append(Plant(name, "Другие растения", 5))  # Стандартное время роста для неизвестных растений
-        return plants
+    @classmethod
+    async def create_async(cls, db, plant_names, use_rule_index=False, inference="crisp", plant_info=None,
+                           cache_decisions=False, metrics=None, sensor=None, plant_zones=None, rng=None):
+        """
+        Создаёт теплицу с асинхронной базой знаний (AsyncNeo4jDB):
+        информация о растениях запрашивается одним пакетным запросом.
+        """
+        greenhouse = cls(db, [], use_rule_index=use_rule_index, inference=inference, plant_info=plant_info,
+                         cache_decisions=cache_decisions, metrics=metrics, sensor=sensor, rng=rng)
+        infos = await greenhouse.plant_info.resolve_async(plant_names)
+        for name, info, zone in zip(plant_names, infos, plant_zones or [DEFAULT_ZONE] * len(plant_names)):
+            greenhouse._add_plant(name, info, zone)
+        return greenhouse
+
+    @property
+    def plants(self):
+        """Растущие растения (представления над PlantStore)."""
+        return [Plant(self.store, index) for index in self.store.alive_indices()]
+
+    @property
+    def all_plants(self):
+        """Все растения в порядке ввода, включая выросшие."""
+        return [Plant(self.store, index) for index in range(self.store.size)]
+
+    def _initialize_plants(self, plant_names, plant_zones=None):
+        """
+        Создаёт растения в хранилище на основе ввода; категории определяются одним запросом.
+        :param plant_zones: Зоны растений в порядке plant_names; None — все в основной зоне.
+        """
+        zones = plant_zones or [DEFAULT_ZONE] * len(plant_names)
+        for name, info, zone in zip(plant_names, self.plant_info.resolve(plant_names), zones):
+            self._add_plant(name, info, zone)
+
+    def _add_plant(self, name, info, zone=DEFAULT_ZONE):
+        """Добавляет растение в хранилище по информации из базы знаний."""
+        if info:
+            logger.info("Растение '%s' отнесено к категории '%s', время роста: %s дней.",
+                        info["name"], info["category"], info["growth_time_days"])
+            self.store.add(name, info["category"], info["growth_time_days"], zone=zone)
+        else:
+            logger.info("Растение '%s' не найдено в базе знаний.", name)
+            # Стандартное время роста для неизвестных растений
+            self.store.add(name, "Другие растения", 5, zone=zone)
 
     def _change_time_of_day(self):
-        """Меняет время суток."""
-        time_cycle = ["ночь", "утро", "день", "вечер"]
-        self.time_of_day = time_cycle[(time_cycle.index(self.time_of_day) + 1) % len(time_cycle)]
+        """
+        Меняет время суток.
+        :return: Индексы растений, выросших при смене времени суток.
+        """
+        self.time_of_day = TIME_CYCLE[(TIME_CYCLE.index(self.time_of_day) + 1) % len(TIME_CYCLE)]
 
-        # При смене на ночь добавляем день и проверяем рост растений
+        # При смене на ночь добавляем день и собираем выросшие растения одной операцией
         if self.time_of_day == "ночь":
             self.day_count += 1
-            for plant in self.plants[:]:
-                if plant.grow():
-                    print(f"Растение '{plant.name}' полностью выросло!")
-                    self.plants.remove(plant)
-
-    def run_simulation(self):
-        """Запускает симуляцию теплицы."""
-        print("Начало симуляции теплицы...")
-        while self.plants:
-            print(f"\nДень {self.day_count}, {self.time_of_day.capitalize()}")
-
-            # Генерация температуры
-            temperature = self.sensor.generate_temperature()
-            print(f"Температура: {temperature}°C")
-
-            for plant in self.plants:
-                # Вывод состояния растения до полива
-                print(f"До полива: Растение '{plant.name}' (тип: {plant.plant_type}) — "
-                      f"день роста: {plant.current_days}/{plant.growth_days}, "
-                      f"влажность: {plant.humidity}%")
-
-                # Обновляем влажность на основе температуры
-                plant.update_humidity(temperature)
-
-                # Определяем необходимость полива через правила
-                additional_humidity = self.rule_engine.process_watering(
-                    plant_type=plant.plant_type,
-                    temperature=temperature,
-                    humidity=plant.humidity,
-                    time_of_day=self.time_of_day,
-                )
-
-                # Применяем полив
-                plant.humidity = min(100, plant.humidity + additional_humidity)  # Влажность не должна превышать 100%
-
-                # Вывод состояния растения после полива
-                print(f"После полива: Растение '{plant.name}' (тип: {plant.plant_type}) — "
-                      f"день роста: {plant.current_days}/{plant.growth_days}, "
-                      f"влажность: {plant.humidity}%")
-
-            # Если все растения выросли, завершаем симуляцию
-            if not self.plants:
-                print("Все растения выращены. Симуляция завершена.")
+            harvested = self.store.grow()
+            if logger.isEnabledFor(logging.INFO):
+                for index in harvested:
+                    logger.info("Растение '%s' полностью выросло!", self.store.names[index])
+            return harvested
+        return np.empty(0, dtype=np.int64)
+
+    def _estimate_ticks(self):
+        """
+        Верхняя оценка количества тактов до созревания всех растений (4 такта в сутках).
+        """
+        alive = self.store.alive_indices()
+        remaining = self.store.growth_days[alive] - self.store.current_days[alive]
+        remaining_days = int(remaining.max()) if alive.size else 0
+        return 4 * (max(remaining_days, 1) + 1)
+
+    def _watering_states(self, indices, temperatures, verbose):
+        """
+        Формирует состояния для правил полива растущих растений.
+        В четком режиме решение зависит только от типа растения и меток влажности и температуры зоны,
+        поэтому правила запрашиваются один раз для каждого такого сочетания.
+        :param indices: Индексы растущих растений.
+        :param temperatures: Температуры зон за такт.
+        :param verbose: Выводить ли решение по каждому растению.
+        :return: Кортеж (состояния, отображение решений на растения или None, если состояния по растениям).
+        """
+        store = self.store
+        humidity = store.humidity[indices]
+        type_codes = store.plant_type[indices]
+        zone_codes = store.zone[indices]
+        plant_temperatures = temperatures[zone_codes].tolist()
+
+        if self.rule_engine.inference == "crisp" and not verbose:
+            _, humidity_codes = fuzzify_humidity_array(humidity)
+            _, temperature_codes = fuzzify_temperature_array(temperatures)
+            # Число меток берётся из реестра: переменные могут быть перезагружены из конфигурации
+            humidity_labels = len(FUZZY_REGISTRY["Влажность"].labels)
+            temperature_labels = len(FUZZY_REGISTRY["Температура"].labels)
+            keys = ((type_codes.astype(np.int64) * humidity_labels + humidity_codes)
+                    * temperature_labels + temperature_codes[zone_codes])
+            _, representatives, inverse = np.unique(keys, return_index=True, return_inverse=True)
+            states = [
+                (store.type_names[type_codes[i]], plant_temperatures[i], humidity[i], self.time_of_day)
+                for i in representatives
+            ]
+            return states, inverse.reshape(-1)
+
+        states = [
+            (store.type_names[code], temperature, value, self.time_of_day)
+            for code, temperature, value in zip(type_codes.tolist(), plant_temperatures, humidity.tolist())
+        ]
+        return states, None
+
+    @staticmethod
+    def _state_weights(inverse):
+        """Количество растений для каждого уникального состояния (метрики правил считаются по растениям)."""
+        return None if inverse is None else np.bincount(inverse).tolist()
+
+    @staticmethod
+    def _expand_watering(watering, inverse):
+        """Раскладывает решения по уникальным состояниям на все растения."""
+        watering = np.asarray(watering, dtype=float)
+        return watering if inverse is None else watering[inverse]
+
+    def _compute_watering(self, indices, temperatures, verbose):
+        """
+        Определяет полив растущих растений через правила одним пакетным запросом.
+        :return: Массив полива для растений indices.
+        """
+        states, inverse = self._watering_states(indices, temperatures, verbose)
+        watering = self.rule_engine.process_watering_batch(states, weights=self._state_weights(inverse))
+        return self._expand_watering(watering, inverse)
+
+    async def _compute_watering_async(self, indices, temperatures, verbose, concurrency):
+        """
+        Определяет полив растущих растений конкурентными запросами к асинхронной базе знаний.
+        :return: Массив полива для растений indices.
+        """
+        states, inverse = self._watering_states(indices, temperatures, verbose)
+        watering = await self.rule_engine.process_watering_concurrent(states, concurrency,
+                                                                      weights=self._state_weights(inverse))
+        return self._expand_watering(watering, inverse)
+
+    def _log_plants(self, stage, indices):
+        """Выводит состояние растений до или после полива."""
+        store = self.store
+        for index in indices:
+            logger.info("%s: Растение '%s' (тип: %s) — день роста: %s/%s, влажность: %s%%",
+                        stage, store.names[index], store.type_names[store.plant_type[index]],
+                        store.current_days[index], store.growth_days[index], store.humidity[index])
+
+    def _start_run(self, max_ticks, history):
+        """Создаёт SimulationResult с бюджетом тактов."""
+        budget = max_ticks if max_ticks is not None else self._estimate_ticks()
+        logger.info("Начало симуляции теплицы...")
+        return SimulationResult(
+            self.store.names,
+            [self.store.type_names[code] for code in self.store.plant_type[:self.store.size]],
+            budget,
+            history=history,
+        )
+
+    def _read_temperatures(self):
+        """
+        Показания датчиков температуры по зонам за такт.
+        :raises SensorStreamEnded: Если поток показаний закончился.
+        """
+        return np.asarray(self.sensor.read_zones(self.store.zone_names))
+
+    def _begin_tick(self):
+        """
+        Начало такта: показания датчиков и высыхание растений.
+        :return: Кортеж (индексы растущих растений, температуры зон, подробный вывод).
+        :raises SensorStreamEnded: Если поток показаний закончился (состояние теплицы не меняется).
+        """
+        temperatures = self._read_temperatures()
+        verbose = logger.isEnabledFor(logging.INFO)
+        if verbose:
+            logger.info("\nДень %s, %s", self.day_count, self.time_of_day.capitalize())
+            if len(temperatures) == 1:
+                logger.info("Температура: %s°C", temperatures[0])
+            else:
+                logger.info("Температура по зонам: %s", ", ".join(
+                    f"{zone} {value}°C" for zone, value in zip(self.store.zone_names, temperatures.tolist())))
+
+        indices = self.store.alive_indices()
+        if verbose:
+            with timed(self.metrics, "tick_phase_seconds", phase="log"):
+                self._log_plants("До полива", indices)
+
+        # Обновляем влажность всех растений на основе температуры их зоны одной операцией
+        with timed(self.metrics, "tick_phase_seconds", phase="dry"):
+            if len(temperatures) == 1:
+                decrease = calculate_humidity_decrease(temperatures[0])
+            else:
+                decrease = calculate_humidity_decrease_array(temperatures)[self.store.zone[indices]]
+            self.store.dry(decrease, indices)
+        return indices, temperatures, verbose
+
+    def _end_tick(self, result, indices, temperatures, watering, verbose):
+        """
+        Конец такта: полив и запись результатов (температура такта — среднее по зонам).
+        """
+        self.store.water(indices, watering)
+        if verbose:
+            with timed(self.metrics, "tick_phase_seconds", phase="log"):
+                self._log_plants("После полива", indices)
+
+        result.record_tick(
+            self.day_count,
+            self.time_of_day,
+            float(np.mean(temperatures)) if len(temperatures) else np.nan,
+            indices,
+            self.store.humidity[indices],
+            watering,
+        )
+
+    def _record_tick_time(self, result, indices, started):
+        """
+        Учитывает время такта в метриках и передаёт событие такта в приёмники.
+        :param started: Момент начала такта (time.perf_counter).
+        """
+        if self.metrics is None:
+            return
+        elapsed = time.perf_counter() - started
+        self.metrics.observe("tick_seconds", elapsed)
+        self.metrics.emit({
+            "event": "tick",
+            "tick": result.ticks - 1,
+            "day": self.day_count,
+            "time_of_day": self.time_of_day,
+            "plants": int(len(indices)),
+            "seconds": elapsed,
+        })
+
+    def _finish_run(self, result):
+        """Передаёт итоговые метрики в приёмники."""
+        if self.metrics is not None:
+            self.metrics.flush()
+        return result
+
+    def _running(self, result):
+        """Продолжается ли симуляция: есть растущие растения и не исчерпан бюджет тактов."""
+        if not self.store.alive_count():
+            logger.info("Все растения выращены. Симуляция завершена.")
+            return False
+        return result.ticks < result.max_ticks
+
+    def run_simulation(self, headless=False, max_ticks=None, history=True, checkpointer=None):
+        """
+        Запускает симуляцию теплицы.
+        :param headless: Режим без пауз между тактами; вывод определяется уровнем логирования.
+        :param max_ticks: Бюджет тактов; None — до созревания всех растений.
+        :param history: Сохранять ли временные ряды по каждому растению.
+        :param checkpointer: Checkpointer для периодических снимков и записи истории на диск.
+        :return: SimulationResult с временными рядами влажности и полива.
+        """
+        result = self._start_run(max_ticks, history)
+        while self._running(result):
+            started = time.perf_counter()
+            try:
+                indices, temperatures, verbose = self._begin_tick()
+            except SensorStreamEnded:
+                logger.info("Показания датчиков закончились. Симуляция остановлена.")
                 break
 
+            # Определяем необходимость полива через правила — один запрос на весь такт
+            with timed(self.metrics, "tick_phase_seconds", phase="watering"):
+                watering = self._compute_watering(indices, temperatures, verbose)
+            self._end_tick(result, indices, temperatures, watering, verbose)
+            self._record_tick_time(result, indices, started)
+
             # Пауза и смена времени суток
-            time.sleep(1)  # Замедление для удобства чтения
-            self._change_time_of_day()
+            if not headless:
+                time.sleep(1)  # Замедление для удобства чтения
+            result.record_harvest(self._change_time_of_day())
+            if checkpointer is not None:
+                checkpointer.after_tick(self, result, indices, watering)
+        if checkpointer is not None:
+            checkpointer.finish(self)
+        return self._finish_run(result)
+
+    async def run_simulation_async(self, headless=False, max_ticks=None, history=True, concurrency=32,
+                                   checkpointer=None):
+        """
+        Асинхронный вариант run_simulation: запросы правил для всех растений такта
+        выполняются конкурентно (не более concurrency одновременно).
+        :param headless: Режим без пауз между тактами.
+        :param max_ticks: Бюджет тактов; None — до созревания всех растений.
+        :param history: Сохранять ли временные ряды по каждому растению.
+        :param concurrency: Максимальное число одновременных запросов к базе знаний.
+        :param checkpointer: Checkpointer для периодических снимков и записи истории на диск.
+        :return: SimulationResult с временными рядами влажности и полива.
+        """
+        result = self._start_run(max_ticks, history)
+        while self._running(result):
+            started = time.perf_counter()
+            try:
+                indices, temperatures, verbose = self._begin_tick()
+            except SensorStreamEnded:
+                logger.info("Показания датчиков закончились. Симуляция остановлена.")
+                break
+            with timed(self.metrics, "tick_phase_seconds", phase="watering"):
+                watering = await self._compute_watering_async(indices, temperatures, verbose, concurrency)
+            self._end_tick(result, indices, temperatures, watering, verbose)
+            self._record_tick_time(result, indices, started)
+
+            if not headless:
+                await asyncio.sleep(1)  # Замедление для удобства чтения
+            result.record_harvest(self._change_time_of_day())
+            if checkpointer is not None:
+                checkpointer.after_tick(self, result, indices, watering)
+        if checkpointer is not None:
+            checkpointer.finish(self)
+        return self._finish_run(result)
+
+    def run_simulation_events(self, max_ticks=None, history=True):
+        """
+        Событийный вариант run_simulation для четкого режима: обрабатываются только такты,
+        на которых растения меняют метку влажности или получают полив (см. EventScheduler).
+        :param max_ticks: Бюджет тактов; None — до созревания всех растений.
+        :param history: Сохранять ли временные ряды по каждому растению.
+        :return: SimulationResult, совпадающий с результатом run_simulation.
+        """
+        return EventScheduler(self).run(max_ticks=max_ticks, history=history)
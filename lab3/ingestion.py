@@ -0,0 +1,240 @@
+import csv
+import json
+import queue
+import socket
+import threading
+from itertools import islice
+
+import numpy as np
+
+from plant_store import DEFAULT_ZONE
+
+_END = object()  # Признак конца потока в очереди
+
+
+class SensorStreamEnded(Exception):
+    """Поток показаний датчиков закончился."""
+
+
+def _reading(record):
+    """
+    Приводит запись датчика к виду {"tick", "zone", "temperature"}.
+    :param record: Словарь с ключами tick, temperature и необязательным zone.
+    """
+    return {
+        "tick": record["tick"],
+        "zone": record.get("zone") or DEFAULT_ZONE,
+        "temperature": float(record["temperature"]),
+    }
+
+
+def read_csv(path):
+    """
+    Читает показания датчиков из CSV-файла со столбцами tick, zone, temperature.
+    :param path: Путь к файлу.
+    :return: Итератор показаний.
+    """
+    with open(path, "r", encoding="utf-8", newline="") as file:
+        for record in csv.DictReader(file):
+            yield _reading(record)
+
+
+def read_jsonl(path):
+    """
+    Читает показания датчиков из файла JSON lines (по одному объекту на строку).
+    :param path: Путь к файлу.
+    :return: Итератор показаний.
+    """
+    with open(path, "r", encoding="utf-8") as file:
+        for line in file:
+            if line.strip():
+                yield _reading(json.loads(line))
+
+
+def read_socket(host, port, timeout=None):
+    """
+    Читает показания датчиков из TCP-сокета в формате JSON lines до закрытия соединения.
+    :param host: Адрес источника.
+    :param port: Порт источника.
+    :param timeout: Таймаут ожидания данных в секундах; None — без ограничения.
+    :return: Итератор показаний.
+    """
+    with socket.create_connection((host, port), timeout=timeout) as connection:
+        with connection.makefile("r", encoding="utf-8") as stream:
+            for line in stream:
+                if line.strip():
+                    yield _reading(json.loads(line))
+
+
+def serve_lines(lines, host="127.0.0.1", port=0):
+    """
+    Локальный источник для отладки: отдаёт строки JSON lines первому подключившемуся клиенту.
+    :param lines: Итерируемые строки (например, открытый файл).
+    :param host: Адрес.
+    :param port: Порт; 0 — выбрать свободный.
+    :return: Кортеж (поток сервера, фактический порт).
+    """
+    server = socket.create_server((host, port))
+
+    def serve():
+        with server:
+            connection, _ = server.accept()
+            with connection, connection.makefile("w", encoding="utf-8") as stream:
+                for line in lines:
+                    stream.write(line if line.endswith("\n") else line + "\n")
+
+    thread = threading.Thread(target=serve, daemon=True)
+    thread.start()
+    return thread, server.getsockname()[1]
+
+
+def open_feed(source):
+    """
+    Открывает источник показаний по описанию.
+    :param source: Путь к файлу .csv или .jsonl либо адрес "host:port".
+    :return: Итератор показаний.
+    """
+    if source.endswith(".csv"):
+        return read_csv(source)
+    if source.endswith(".jsonl") or source.endswith(".json"):
+        return read_jsonl(source)
+    host, _, port = source.rpartition(":")
+    return read_socket(host or "127.0.0.1", int(port))
+
+
+def micro_batches(readings, size=1024):
+    """
+    Группирует показания в пакеты по size штук.
+    :return: Итератор списков показаний.
+    """
+    readings = iter(readings)
+    while True:
+        batch = list(islice(readings, size))
+        if not batch:
+            return
+        yield batch
+
+
+def buffered(batches, maxsize=8):
+    """
+    Читает пакеты в фоновом потоке через очередь ограниченного размера:
+    чтение диска или сети идёт параллельно с симуляцией, а при медленном потребителе
+    поток-читатель блокируется (не больше maxsize пакетов в памяти).
+    Ошибка чтения передаётся потребителю.
+    :param batches: Итерируемые пакеты показаний.
+    :param maxsize: Максимальное количество пакетов в очереди.
+    :return: Итератор пакетов.
+    """
+    buffer = queue.Queue(maxsize)
+    stop = threading.Event()
+
+    def put(item):
+        """Кладёт элемент в очередь, пока потребитель не остановился; False — потребитель ушёл."""
+        while not stop.is_set():
+            try:
+                buffer.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for batch in batches:
+                if not put(batch):
+                    return
+            put(_END)
+        except Exception as error:
+            put(error)
+
+    thread = threading.Thread(target=produce, daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = buffer.get()
+            if item is _END:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        stop.set()  # Потребитель остановился раньше: освобождаем поток-читатель
+
+
+def tick_readings(batches):
+    """
+    Собирает показания из пакетов по тактам: подряд идущие показания с одинаковым tick
+    образуют один такт. Повторные показания одной зоны в такте усредняются.
+    :param batches: Итерируемые пакеты показаний.
+    :return: Итератор словарей зона -> температура.
+    """
+    current_tick = _END
+    sums, counts = {}, {}
+    for batch in batches:
+        for reading in batch:
+            if reading["tick"] != current_tick:
+                if counts:
+                    yield {zone: sums[zone] / counts[zone] for zone in sums}
+                current_tick = reading["tick"]
+                sums, counts = {}, {}
+            zone = reading["zone"]
+            sums[zone] = sums.get(zone, 0.0) + reading["temperature"]
+            counts[zone] = counts.get(zone, 0) + 1
+    if counts:
+        yield {zone: sums[zone] / counts[zone] for zone in sums}
+
+
+class StreamSensor:
+    def __init__(self, ticks):
+        """
+        Датчики зон теплицы, показания которых поступают из потока (файла или сокета).
+        Зона без показаний в такте получает своё последнее значение,
+        а до первого показания — среднее по зонам такта.
+        :param ticks: Итератор словарей зона -> температура (см. tick_readings).
+        """
+        self._ticks = iter(ticks)
+        self._last = {}
+
+    @classmethod
+    def from_source(cls, source, batch_size=1024, maxsize=8):
+        """
+        Создаёт датчики по описанию источника с фоновым чтением пакетами.
+        :param source: Путь к .csv/.jsonl или "host:port" (см. open_feed).
+        :param batch_size: Размер пакета показаний.
+        :param maxsize: Максимальное количество пакетов в очереди чтения.
+        """
+        return cls(tick_readings(buffered(micro_batches(open_feed(source), batch_size), maxsize)))
+
+    def read_zones(self, zone_names):
+        """
+        Показания следующего такта для зон.
+        :param zone_names: Названия зон в порядке кодов PlantStore.
+        :return: Массив температур по зонам.
+        """
+        readings = next(self._ticks, None)
+        if readings is None:
+            raise SensorStreamEnded()
+        self._last.update(readings)
+        fallback = sum(readings.values()) / len(readings)
+        return np.array([self._last.get(zone, fallback) for zone in zone_names])
+
+    def read_ticks(self, zone_names, count):
+        """
+        Показания не более чем count тактов подряд (меньше, если поток закончился).
+        :return: Матрица такты x зоны.
+        """
+        rows = []
+        try:
+            while len(rows) < count:
+                rows.append(self.read_zones(zone_names))
+        except SensorStreamEnded:
+            pass
+        return np.array(rows).reshape(len(rows), len(zone_names))
+
+    def generate_temperature(self):
+        """Средняя температура следующего такта по всем зонам."""
+        readings = next(self._ticks, None)
+        if readings is None:
+            raise SensorStreamEnded()
+        self._last.update(readings)
+        return sum(readings.values()) / len(readings)
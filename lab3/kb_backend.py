@@ -0,0 +1,75 @@
+from abc import ABC, abstractmethod
+
+
+class KnowledgeBackend(ABC):
+    """
+    Общий интерфейс базы знаний теплицы.
+    Greenhouse и RuleEngine работают с любой реализацией: Neo4jDB или локальной InMemoryDB.
+    """
+
+    rules_version = 0  # Увеличивается при каждом изменении правил
+
+    @abstractmethod
+    def get_plant_info(self, plant_name):
+        """
+        Ищет информацию о растении по имени.
+        :param plant_name: Название растения.
+        :return: Словарь с информацией о растении или None, если растение не найдено.
+        """
+
+    def get_plant_info_batch(self, plant_names):
+        """
+        Ищет информацию о нескольких растениях.
+        Реализация по умолчанию выполняет отдельный поиск для каждого названия.
+        :param plant_names: Список уникальных названий.
+        :return: Словарь название -> информация о растении (None, если растение не найдено).
+        """
+        return {name: self.get_plant_info(name) for name in plant_names}
+
+    @abstractmethod
+    def fetch_basic_watering(self, plant_type, fuzzified_humidity):
+        """
+        Получает базовое правило полива.
+        :param plant_type: Тип растения.
+        :param fuzzified_humidity: Фаззифицированное значение влажности.
+        :return: Словарь с правилом и действием, либо None, если правило не найдено.
+        """
+
+    @abstractmethod
+    def fetch_advanced_watering(self, plant_type, fuzzified_humidity, fuzzified_temperature, time_of_day):
+        """
+        Получает углубленное правило полива.
+        :param plant_type: Тип растения.
+        :param fuzzified_humidity: Фаззифицированное значение влажности.
+        :param fuzzified_temperature: Фаззифицированное значение температуры.
+        :param time_of_day: Время суток.
+        :return: Словарь с правилом и действием, либо None, если правило не найдено.
+        """
+
+    @abstractmethod
+    def fetch_all_rules(self):
+        """
+        Выгружает все правила полива вместе с условиями и действиями.
+        :return: Список словарей с описанием правил.
+        """
+
+    def fetch_watering_batch(self, states):
+        """
+        Получает базовые и углубленные правила полива для набора состояний.
+        Реализация по умолчанию выполняет отдельный поиск для каждого состояния.
+        :param states: Список словарей с ключами plant_type, humidity_level, temperature, time_of_day.
+        :return: Список пар (базовое правило, углубленное правило) в порядке состояний.
+        """
+        return [
+            (
+                self.fetch_basic_watering(state["plant_type"], state["humidity_level"]),
+                self.fetch_advanced_watering(state["plant_type"], state["humidity_level"],
+                                             state["temperature"], state["time_of_day"]),
+            )
+            for state in states
+        ]
+
+    def close(self):
+        """
+        Освобождает ресурсы базы знаний.
+        """
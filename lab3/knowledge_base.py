@@ -1,21 +1,269 @@
-from neo4j import GraphDatabase
+import logging
+import threading
+import time
 
-class Neo4jDB:
-    def __init__(self, uri, user, password):
+try:
+    from neo4j import GraphDatabase
+except ImportError:  # Драйвер нужен только для Neo4jDB, локальная база знаний работает без него
+    GraphDatabase = None
+
+from kb_backend import KnowledgeBackend
+from metrics import timed
+
+logger = logging.getLogger(__name__)
+
+# Ограничения уникальности и индексы графа правил. IF NOT EXISTS делает создание идемпотентным.
+# Узел условия хранит key — сочетание всех четырёх свойств, по нему условия не дублируются.
+# Составной индекс включает только узлы, у которых заданы все его свойства,
+# поэтому для базовых условий (без температуры и времени суток) есть отдельный индекс.
+SCHEMA_STATEMENTS = [
+    "CREATE CONSTRAINT rule_name IF NOT EXISTS FOR (rule:Rule) REQUIRE rule.name IS UNIQUE",
+    "CREATE CONSTRAINT action_name IF NOT EXISTS FOR (action:Action) REQUIRE action.name IS UNIQUE",
+    "CREATE CONSTRAINT plant_name IF NOT EXISTS FOR (plant:Plant) REQUIRE plant.name IS UNIQUE",
+    "CREATE CONSTRAINT category_name IF NOT EXISTS FOR (category:Category) REQUIRE category.name IS UNIQUE",
+    "CREATE CONSTRAINT condition_key IF NOT EXISTS FOR (condition:Condition) REQUIRE condition.key IS UNIQUE",
+    """CREATE INDEX condition_basic IF NOT EXISTS FOR (condition:Condition)
+       ON (condition.plant_type, condition.humidity_level)""",
+    """CREATE INDEX condition_advanced IF NOT EXISTS FOR (condition:Condition)
+       ON (condition.plant_type, condition.humidity_level, condition.temperature, condition.time_of_day)""",
+]
+
+CONDITION_PROPERTIES = ("plant_type", "humidity_level", "temperature", "time_of_day")
+
+# Операторы плана, означающие полный перебор узлов вместо поиска по индексу
+SCAN_OPERATORS = ("AllNodesScan", "NodeByLabelScan")
+
+BASIC_WATERING_QUERY = """
+MATCH (rule:Rule {type: "basic"})-[:HAS_CONDITION]->(condition:Condition)
+WHERE condition.plant_type = $plant_type AND condition.humidity_level = $fuzzified_humidity
+MATCH (rule)-[:REQUIRES_ACTION]->(action:Action)
+RETURN rule.name AS rule_name, action.name AS action_name
+LIMIT 1
+"""
+
+ADVANCED_WATERING_QUERY = """
+MATCH (rule:Rule {type: "advanced"})-[:HAS_CONDITION]->(condition:Condition)
+WHERE condition.plant_type = $plant_type AND 
+      condition.humidity_level = $fuzzified_humidity AND 
+      condition.temperature = $fuzzified_temperature AND 
+      condition.time_of_day = $time_of_day
+MATCH (rule)-[:REQUIRES_ACTION]->(action:Action)
+RETURN rule.name AS rule_name, action.name AS action_name
+LIMIT 1
+"""
+
+WATERING_BATCH_QUERY = """
+UNWIND range(0, size($states) - 1) AS idx
+WITH idx, $states[idx] AS state
+RETURN idx,
+       head([(action:Action)<-[:REQUIRES_ACTION]-(rule:Rule {type: "basic"})-[:HAS_CONDITION]->(condition:Condition)
+             WHERE condition.plant_type = state.plant_type AND
+                   condition.humidity_level = state.humidity_level
+             | {rule_name: rule.name, action_name: action.name}]) AS basic_rule,
+       head([(action:Action)<-[:REQUIRES_ACTION]-(rule:Rule {type: "advanced"})-[:HAS_CONDITION]->(condition:Condition)
+             WHERE condition.plant_type = state.plant_type AND
+                   condition.humidity_level = state.humidity_level AND
+                   condition.temperature = state.temperature AND
+                   condition.time_of_day = state.time_of_day
+             | {rule_name: rule.name, action_name: action.name}]) AS advanced_rule
+"""
+
+ALL_RULES_QUERY = """
+MATCH (rule:Rule)-[:HAS_CONDITION]->(condition:Condition)
+MATCH (rule)-[:REQUIRES_ACTION]->(action:Action)
+RETURN rule.name AS rule_name,
+       rule.type AS rule_type,
+       condition.plant_type AS plant_type,
+       condition.humidity_level AS humidity_level,
+       condition.temperature AS temperature,
+       condition.time_of_day AS time_of_day,
+       action.name AS action_name
+"""
+
+PLANT_INFO_QUERY = """
+MATCH (plant:Plant {name: $plant_name})
+OPTIONAL MATCH (plant)-[:BELONGS_TO]->(category:Category)
+RETURN plant.name AS name, 
+       category.name AS category,
+       category.growth_time_days AS growth_time_days
+"""
+
+PLANT_INFO_BATCH_QUERY = """
+UNWIND $plant_names AS plant_name
+MATCH (plant:Plant {name: plant_name})
+OPTIONAL MATCH (plant)-[:BELONGS_TO]->(category:Category)
+RETURN plant.name AS name,
+       category.name AS category,
+       category.growth_time_days AS growth_time_days
+"""
+
+# Короткие имена запросов для метрик
+QUERY_NAMES = {
+    BASIC_WATERING_QUERY: "basic_watering",
+    ADVANCED_WATERING_QUERY: "advanced_watering",
+    WATERING_BATCH_QUERY: "watering_batch",
+    ALL_RULES_QUERY: "all_rules",
+    PLANT_INFO_QUERY: "plant_info",
+    PLANT_INFO_BATCH_QUERY: "plant_info_batch",
+}
+
+
+def record_query(metrics, query, seconds, records):
+    """
+    Учитывает выполненный запрос в метриках: время, количество запросов и полученных записей.
+    """
+    name = QUERY_NAMES.get(query, "other")
+    metrics.observe("kb_query_seconds", seconds, query=name)
+    metrics.increment("kb_queries_total", query=name)
+    metrics.increment("kb_records_total", len(records), query=name)
+
+
+def condition_key(conditions):
+    """
+    Ключ узла условия: значения всех свойств по порядку, отсутствующие — пустая строка.
+    :param conditions: Словарь условий правила (как в WATERING_RULES).
+    """
+    return "|".join(conditions.get(name) or "" for name in CONDITION_PROPERTIES)
+
+
+def plan_operators(plan):
+    """
+    Список операторов плана запроса (обход дерева плана, полученного через EXPLAIN).
+    :param plan: План в виде словаря с ключами operatorType, args и children.
+    :return: Список пар (оператор, подробности).
+    """
+    operators = []
+    stack = [plan]
+    while stack:
+        node = stack.pop()
+        if not node:
+            continue
+        details = (node.get("args") or node.get("arguments") or {}).get("Details", "")
+        operators.append((node.get("operatorType", "").split("@")[0], details))
+        stack.extend(node.get("children", []))
+    return operators
+
+
+def plant_info_from_record(record):
+    """
+    Преобразует запись PLANT_INFO_QUERY в словарь с информацией о растении.
+    :param record: Запись в виде словаря.
+    :return: Словарь с названием, категорией и временем роста.
+    """
+    return {
+        "name": record["name"],
+        "category": record["category"] or "Другие растения",
+        "growth_time_days": record["growth_time_days"] or 0  # Если время роста не указано
+    }
+
+
+class Neo4jDB(KnowledgeBackend):
+    def __init__(self, uri, user, password, metrics=None, **driver_config):
         """
         Инициализация подключения к Neo4j.
         :param uri: URI для подключения к Neo4j.
         :param user: Имя пользователя.
         :param password: Пароль.
+        :param metrics: Экземпляр Metrics для учёта времени и количества запросов; None — без учёта.
+        :param driver_config: Дополнительные настройки драйвера, передаются в GraphDatabase.driver
+                              (например, max_connection_pool_size, connection_acquisition_timeout).
         """
-        self.driver = GraphDatabase.driver(uri, auth=(user, password))
+        if GraphDatabase is None:
+            raise ImportError("Для подключения к Neo4j установите пакет neo4j")
+        self.driver = GraphDatabase.driver(uri, auth=(user, password), **driver_config)
+        self.rules_version = 0  # Увеличивается при каждом изменении правил в графе
+        self.metrics = metrics
+        self._local = threading.local()  # Долгоживущая сессия для каждого потока
+        self._sessions = []
+        self._sessions_lock = threading.Lock()
 
     def close(self):
         """
         Закрытие подключения к базе данных.
         """
+        with self._sessions_lock:
+            for session in self._sessions:
+                session.close()
+            self._sessions.clear()
+        self._local = threading.local()
         self.driver.close()
 
+    def _session(self):
+        """
+        Возвращает сессию текущего потока, создавая её при первом обращении.
+        Сессии в драйвере Neo4j не потокобезопасны, поэтому каждый поток получает свою.
+        """
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self.driver.session()
+            self._local.session = session
+            with self._sessions_lock:
+                self._sessions.append(session)
+        return session
+
+    def _read(self, query, **params):
+        """
+        Выполняет запрос на чтение в управляемой транзакции.
+        :param query: Текст Cypher-запроса.
+        :param params: Параметры запроса.
+        :return: Список записей в виде словарей.
+        """
+        def work(tx):
+            return [record.data() for record in tx.run(query, **params)]
+        if self.metrics is None:
+            return self._session().execute_read(work)
+
+        started = time.perf_counter()
+        try:
+            records = self._session().execute_read(work)
+        except Exception:
+            self.metrics.increment("kb_query_errors_total", query=QUERY_NAMES.get(query, "other"))
+            raise
+        record_query(self.metrics, query, time.perf_counter() - started, records)
+        return records
+
+    def setup_schema(self):
+        """
+        Создаёт ограничения уникальности и индексы графа правил (повторный вызов ничего не меняет).
+        Изменения схемы нельзя совмещать с записью данных, поэтому каждое выполняется отдельно.
+        """
+        with timed(self.metrics, "kb_write_seconds", query="schema"):
+            for statement in SCHEMA_STATEMENTS:
+                self.driver.execute_query(statement)
+
+    def explain(self, query, **params):
+        """
+        План выполнения запроса без его выполнения (EXPLAIN).
+        :return: Список пар (оператор, подробности), см. plan_operators.
+        """
+        def work(tx):
+            return tx.run("EXPLAIN " + query, **params).consume().plan
+        return plan_operators(self._session().execute_read(work))
+
+    def verify_query_plans(self):
+        """
+        Проверяет, что запросы правил полива находят условия и растения поиском по индексу,
+        а не перебором всех узлов метки.
+        :return: Словарь имя запроса -> список операторов перебора (пустой, если план корректен).
+        """
+        state = {"plant_type": "", "humidity_level": "", "temperature": "", "time_of_day": ""}
+        checks = {
+            BASIC_WATERING_QUERY: {"plant_type": "", "fuzzified_humidity": ""},
+            ADVANCED_WATERING_QUERY: {"plant_type": "", "fuzzified_humidity": "",
+                                      "fuzzified_temperature": "", "time_of_day": ""},
+            WATERING_BATCH_QUERY: {"states": [state]},
+            PLANT_INFO_QUERY: {"plant_name": ""},
+            PLANT_INFO_BATCH_QUERY: {"plant_names": [""]},
+        }
+        scans = {}
+        for query, params in checks.items():
+            name = QUERY_NAMES[query]
+            scans[name] = [f"{operator}({details})" for operator, details in self.explain(query, **params)
+                           if operator in SCAN_OPERATORS]
+            if scans[name]:
+                logger.warning("Запрос %s перебирает узлы без индекса: %s", name, ", ".join(scans[name]))
+        return scans
+
     def fetch_basic_watering(self, plant_type, fuzzified_humidity):
         """
         Получает базовые правила полива из базы данных.
@@ -23,19 +271,8 @@ class Neo4jDB:
         :param fuzzified_humidity: Фаззифицированное значение влажности.
         :return: Словарь с правилом и действием, либо None, если правило не найдено.
         """
-        query = """
-        MATCH (rule:Rule {type: "basic"})-[:HAS_CONDITION]->(condition:Condition)
-        WHERE condition.plant_type = $plant_type AND condition.humidity_level = $fuzzified_humidity
-        MATCH (rule)-[:REQUIRES_ACTION]->(action:Action)
-        RETURN rule.name AS rule_name, action.name AS action_name
-        LIMIT 1
-        """
-        with self.driver.session() as session:
-            result = session.run(query, plant_type=plant_type, fuzzified_humidity=fuzzified_humidity)
-            record = result.single()
-            if record:
-                return {"rule_name": record["rule_name"], "action_name": record["action_name"]}
-            return None
+        records = self._read(BASIC_WATERING_QUERY, plant_type=plant_type, fuzzified_humidity=fuzzified_humidity)
+        return records[0] if records else None
 
     def fetch_advanced_watering(self, plant_type, fuzzified_humidity, fuzzified_temperature, time_of_day):
         """
@@ -46,95 +283,155 @@ class Neo4jDB:
         :param time_of_day: Время суток.
         :return: Словарь с правилом и действием, либо None, если правило не найдено.
         """
-        query = """
-        MATCH (rule:Rule {type: "advanced"})-[:HAS_CONDITION]->(condition:Condition)
-        WHERE condition.plant_type = $plant_type AND 
-              condition.humidity_level = $fuzzified_humidity AND 
-              condition.temperature = $fuzzified_temperature AND 
-              condition.time_of_day = $time_of_day
-        MATCH (rule)-[:REQUIRES_ACTION]->(action:Action)
-        RETURN rule.name AS rule_name, action.name AS action_name
-        LIMIT 1
-        """
-        with self.driver.session() as session:
-            result = session.run(
-                query,
-                plant_type=plant_type,
-                fuzzified_humidity=fuzzified_humidity,
-                fuzzified_temperature=fuzzified_temperature,
-                time_of_day=time_of_day,
-            )
-            record = result.single()
-            if record:
-                return {"rule_name": record["rule_name"], "action_name": record["action_name"]}
-            return None
-
-    def setup_ontology_and_rules(self):
-        with self.driver.session() as session:
-            session.run("MATCH (n) DETACH DELETE n")  # Очистка базы для примера
-
-            for rule in WATERING_RULES:
-                conditions = rule["conditions"]
-                action_name = rule["action"]
-                rule_type = rule["type"]
-
-                # Создаем правило с учетом типа
-                session.run("""
-                MERGE (action:Action {name: $action_name})
-                MERGE (rule:Rule {name: $rule_name, type: $rule_type})
-                """, action_name=action_name, rule_name=rule["name"], rule_type=rule_type)
-
-                # Создаем узел Condition с полным набором свойств
-                condition_properties = {k: v for k, v in conditions.items() if v is not None}
-                if condition_properties:  # Создаем только если есть свойства
-                    # Генерация строк для MERGE и передачи параметров
-                    condition_merge = "MERGE (condition:Condition {" + ", ".join(
-                        [f"{key}: ${key}" for key in condition_properties.keys()]
-                    ) + "})"
-
-                    # Выполнение запроса с передачей параметров
-                    session.run(condition_merge, **condition_properties)
-
-                    # Связываем правило с этим условием
-                    condition_match = "MATCH (condition:Condition {" + ", ".join(
-                        [f"{key}: ${key}" for key in condition_properties.keys()]
-                    ) + "})"
-                    session.run(f"""
-                    MATCH (rule:Rule {{name: $rule_name}})
-                    {condition_match}
-                    MERGE (rule)-[:HAS_CONDITION]->(condition)
-                    """, rule_name=rule["name"], **condition_properties)
-
-                # Связываем правило с действием
-                session.run("""
-                MATCH (rule:Rule {name: $rule_name})
-                MATCH (action:Action {name: $action_name})
-                MERGE (rule)-[:REQUIRES_ACTION]->(action)
-                """, rule_name=rule["name"], action_name=action_name)
+        records = self._read(
+            ADVANCED_WATERING_QUERY,
+            plant_type=plant_type,
+            fuzzified_humidity=fuzzified_humidity,
+            fuzzified_temperature=fuzzified_temperature,
+            time_of_day=time_of_day,
+        )
+        return records[0] if records else None
+
+    def fetch_watering_batch(self, states):
+        """
+        Получает базовые и углубленные правила полива для набора состояний одним запросом.
+        :param states: Список словарей с ключами plant_type, humidity_level, temperature, time_of_day.
+        :return: Список пар (базовое правило, углубленное правило) в порядке состояний;
+                 отсутствующее правило обозначается None.
+        """
+        results = [(None, None)] * len(states)
+        if not states:
+            return results
+        for record in self._read(WATERING_BATCH_QUERY, states=states):
+            results[record["idx"]] = (record["basic_rule"], record["advanced_rule"])
+        return results
+
+    def fetch_all_rules(self):
+        """
+        Выгружает все правила полива вместе с условиями и действиями.
+        Используется для построения индекса правил в памяти.
+        :return: Список словарей с описанием правил.
+        """
+        return self._read(ALL_RULES_QUERY)
+
+    def setup_ontology_and_rules(self, rules=None):
+        """
+        Создаёт или обновляет онтологию правил полива в базе знаний.
+        Миграция идемпотентна: узлы сопоставляются по именам и ключам условий,
+        изменённые связи перестраиваются, правила, которых больше нет в списке,
+        удаляются вместе с осиротевшими условиями и действиями. Остальные данные графа не затрагиваются.
+        Все изменения выполняются в одной управляемой транзакции пакетными UNWIND-запросами.
+        :param rules: Список правил в формате WATERING_RULES; None — WATERING_RULES.
+        :return: True, если граф изменился.
+        """
+        with timed(self.metrics, "kb_write_seconds", query="setup_rules"):
+            changed = self._session().execute_write(self._write_rules, WATERING_RULES if rules is None else rules)
+        if changed:
+            self.rules_version += 1  # Сообщаем индексам правил о необходимости перезагрузки
+        return changed
+
+    @staticmethod
+    def _write_rules(tx, rules):
+        """
+        Записывает правила, условия и действия в рамках одной транзакции.
+        :param tx: Управляемая транзакция.
+        :param rules: Список правил в формате WATERING_RULES.
+        :return: True, если граф изменился.
+        """
+        rows = []
+        for rule in rules:
+            conditions = {k: v for k, v in rule["conditions"].items() if v is not None}
+            rows.append({
+                "name": rule["name"],
+                "type": rule["type"],
+                "action": rule["action"],
+                "key": condition_key(conditions) if conditions else None,  # Условие только при заданных свойствах
+                "conditions": conditions,
+            })
+        summaries = []
+
+        # Правила и действия: тип обновляется, связь с прежним действием заменяется
+        summaries.append(tx.run("""
+        UNWIND $rows AS row
+        MERGE (action:Action {name: row.action})
+        MERGE (rule:Rule {name: row.name})
+        WITH rule, row, action
+        CALL {
+            WITH rule, row
+            WITH rule, row WHERE rule.type IS NULL OR rule.type <> row.type
+            SET rule.type = row.type
+        }
+        CALL {
+            WITH rule, action
+            MATCH (rule)-[old:REQUIRES_ACTION]->(other:Action)
+            WHERE other <> action
+            DELETE old
+        }
+        MERGE (rule)-[:REQUIRES_ACTION]->(action)
+        """, rows=rows).consume())
+
+        # Условия: один узел на набор свойств (ключ), связь с прежним условием заменяется
+        summaries.append(tx.run("""
+        UNWIND $rows AS row
+        MATCH (rule:Rule {name: row.name})
+        CALL {
+            WITH rule, row
+            MATCH (rule)-[old:HAS_CONDITION]->(other:Condition)
+            WHERE other.key IS NULL OR other.key <> row.key OR row.key IS NULL
+            DELETE old
+        }
+        WITH rule, row WHERE row.key IS NOT NULL
+        MERGE (condition:Condition {key: row.key})
+        ON CREATE SET condition += row.conditions
+        MERGE (rule)-[:HAS_CONDITION]->(condition)
+        """, rows=rows).consume())
+
+        # Правила, которых нет в списке, и узлы, на которые больше не ссылается ни одно правило
+        summaries.append(tx.run("""
+        MATCH (rule:Rule) WHERE NOT rule.name IN $names
+        DETACH DELETE rule
+        """, names=[row["name"] for row in rows]).consume())
+        summaries.append(tx.run("""
+        MATCH (condition:Condition) WHERE NOT (condition)<-[:HAS_CONDITION]-(:Rule)
+        DETACH DELETE condition
+        """).consume())
+        summaries.append(tx.run("""
+        MATCH (action:Action) WHERE NOT (action)<-[:REQUIRES_ACTION]-(:Rule)
+        DETACH DELETE action
+        """).consume())
+        return any(summary.counters.contains_updates for summary in summaries)
 
     def initialize_plant_types(self):
         """
         Инициализирует категории растений, соответствующие им растения и время роста в базе знаний.
+        Повторный вызов обновляет время роста и переносит растения, сменившие категорию.
         """
-        with self.driver.session() as session:
-            # Создание узлов категорий и растений
-            for plant_type, data in PLANT_TYPES.items():
-                growth_time_days = data["growth_time_days"]
-                plants = data["plants"]
-
-                # Создаем узел категории с временем роста
-                session.run("""
-                MERGE (category:Category {name: $plant_type})
-                SET category.growth_time_days = $growth_time_days
-                """, plant_type=plant_type, growth_time_days=growth_time_days)
-
-                # Создаем узлы растений и связываем с категориями
-                for plant in plants:
-                    session.run("""
-                    MERGE (plant:Plant {name: $plant_name})
-                    MERGE (category:Category {name: $plant_type})
-                    MERGE (plant)-[:BELONGS_TO]->(category)
-                    """, plant_name=plant, plant_type=plant_type)
+        categories = [
+            {"name": plant_type, "growth_time_days": data["growth_time_days"], "plants": data["plants"]}
+            for plant_type, data in PLANT_TYPES.items()
+        ]
+
+        def work(tx):
+            # Создаем узлы категорий с временем роста, затем узлы растений со связями
+            tx.run("""
+            UNWIND $categories AS row
+            MERGE (category:Category {name: row.name})
+            SET category.growth_time_days = row.growth_time_days
+            WITH category, row
+            UNWIND row.plants AS plant_name
+            MERGE (plant:Plant {name: plant_name})
+            WITH plant, category
+            CALL {
+                WITH plant, category
+                MATCH (plant)-[old:BELONGS_TO]->(other:Category)
+                WHERE other <> category
+                DELETE old
+            }
+            MERGE (plant)-[:BELONGS_TO]->(category)
+            """, categories=categories)
+
+        with timed(self.metrics, "kb_write_seconds", query="plant_types"):
+            self._session().execute_write(work)
 
     def get_plant_info(self, plant_name):
         """
@@ -142,22 +439,21 @@ class Neo4jDB:
         :param plant_name: Название растения.
         :return: Словарь с информацией о растении или None, если растение не найдено.
         """
-        with self.driver.session() as session:
-            query = """
-            MATCH (plant:Plant {name: $plant_name})
-            OPTIONAL MATCH (plant)-[:BELONGS_TO]->(category:Category)
-            RETURN plant.name AS name, 
-                   category.name AS category,
-                   category.growth_time_days AS growth_time_days
-            """
-            result = session.run(query, plant_name=plant_name).single()
-            if result:
-                return {
-                    "name": result["name"],
-                    "category": result["category"] or "Другие растения",
-                    "growth_time_days": result["growth_time_days"] or 0  # Если время роста не указано
-                }
-            return None
+        records = self._read(PLANT_INFO_QUERY, plant_name=plant_name)
+        return plant_info_from_record(records[0]) if records else None
+
+    def get_plant_info_batch(self, plant_names):
+        """
+        Ищет информацию о нескольких растениях одним запросом.
+        :param plant_names: Список уникальных названий.
+        :return: Словарь название -> информация о растении (None, если растение не найдено).
+        """
+        infos = dict.fromkeys(plant_names)
+        if plant_names:
+            for record in self._read(PLANT_INFO_BATCH_QUERY, plant_names=list(plant_names)):
+                if infos.get(record["name"]) is None:
+                    infos[record["name"]] = plant_info_from_record(record)
+        return infos
 
 
 PLANT_TYPES = {
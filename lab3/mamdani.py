@@ -0,0 +1,120 @@
+import numpy as np
+
+from fuzzy_logic import FUZZY_REGISTRY, triangular_membership_array
+
+
+class MamdaniInference:
+    def __init__(self, rules, resolution=301, chunk_size=4096):
+        """
+        Нечеткий вывод по Мамдани: срабатывают все правила, агрегация min/max,
+        дефаззификация методом центра тяжести на дискретизированном универсуме полива.
+        Кривые выходных термов и параметры правил вычисляются один раз при создании.
+        :param rules: Список правил в формате fetch_all_rules.
+        :param resolution: Количество точек дискретизации выходного универсума.
+        :param chunk_size: Количество растений, обрабатываемых за один проход (ограничивает память).
+        """
+        self.temperature = FUZZY_REGISTRY["Температура"]
+        self.humidity = FUZZY_REGISTRY["Влажность"]
+        self.output = FUZZY_REGISTRY["Полив"]
+        self.chunk_size = chunk_size
+
+        low, high = self.output.universe
+        self.universe = np.linspace(low, high, resolution)
+        self.output_curves = np.stack(
+            [triangular_membership_array(self.universe, *params) for params in self.output.terms.values()]
+        )
+
+        # Правила с действием вне выходной переменной не дают вклада (как и в defuzzify_watering)
+        rules = [
+            rule for rule in rules
+            if rule["action_name"] in self.output.terms and rule["humidity_level"] in self.humidity.terms
+        ]
+        self.plant_types = {}
+        for rule in rules:
+            self.plant_types.setdefault(rule["plant_type"], len(self.plant_types))
+        self.times_of_day = {}
+        for rule in rules:
+            if rule["rule_type"] == "advanced":
+                self.times_of_day.setdefault(rule["time_of_day"], len(self.times_of_day))
+
+        output_codes = {label: code for code, label in enumerate(self.output.labels)}
+        humidity_codes = {label: code for code, label in enumerate(self.humidity.labels)}
+        temperature_codes = {label: code for code, label in enumerate(self.temperature.labels)}
+
+        # Для базовых правил температура и время суток не учитываются (код -1)
+        advanced = [rule["rule_type"] == "advanced" for rule in rules]
+        self.rule_plant_type = np.array([self.plant_types[rule["plant_type"]] for rule in rules], dtype=np.int64)
+        self.rule_humidity = np.array([humidity_codes[rule["humidity_level"]] for rule in rules], dtype=np.int64)
+        self.rule_temperature = np.array(
+            [temperature_codes.get(rule["temperature"], -1) if is_advanced else -1
+             for rule, is_advanced in zip(rules, advanced)], dtype=np.int64
+        )
+        self.rule_time_of_day = np.array(
+            [self.times_of_day[rule["time_of_day"]] if is_advanced else -1
+             for rule, is_advanced in zip(rules, advanced)], dtype=np.int64
+        )
+        rule_output = np.array([output_codes[rule["action_name"]] for rule in rules], dtype=np.int64)
+        self.rules_by_output = [np.flatnonzero(rule_output == code) for code in range(len(self.output.labels))]
+
+    def infer(self, plant_type, temperature, humidity, time_of_day):
+        """
+        Вычисляет полив для одного растения.
+        :param plant_type: Тип растения.
+        :param temperature: Текущая температура.
+        :param humidity: Текущая влажность.
+        :param time_of_day: Время суток.
+        :return: Увеличение влажности (float).
+        """
+        return float(self.infer_batch([plant_type], [temperature], [humidity], [time_of_day])[0])
+
+    def infer_batch(self, plant_types, temperatures, humidities, times_of_day):
+        """
+        Вычисляет полив для набора растений.
+        :param plant_types: Типы растений.
+        :param temperatures: Температуры.
+        :param humidities: Значения влажности.
+        :param times_of_day: Время суток для каждого растения.
+        :return: Массив увеличений влажности.
+        """
+        type_codes = np.array([self.plant_types.get(plant_type, -2) for plant_type in plant_types], dtype=np.int64)
+        time_codes = np.array([self.times_of_day.get(time_of_day, -2) for time_of_day in times_of_day],
+                              dtype=np.int64)
+        temperatures = np.asarray(temperatures)
+        humidities = np.asarray(humidities)
+
+        result = np.zeros(len(type_codes))
+        for start in range(0, len(type_codes), self.chunk_size):
+            chunk = slice(start, start + self.chunk_size)
+            result[chunk] = self._infer_chunk(type_codes[chunk], temperatures[chunk],
+                                              humidities[chunk], time_codes[chunk])
+        return result
+
+    def _infer_chunk(self, type_codes, temperatures, humidities, time_codes):
+        """
+        Вывод для части растений: степени срабатывания правил, агрегация и центр тяжести.
+        """
+        humidity_memberships, _ = self.humidity.memberships_array(humidities)
+        temperature_memberships, _ = self.temperature.memberships_array(temperatures)
+
+        # Степень срабатывания правила: min по нечетким условиям, 0 при несовпадении четких
+        strength = humidity_memberships[:, self.rule_humidity]
+        has_temperature = self.rule_temperature >= 0
+        strength[:, has_temperature] = np.minimum(
+            strength[:, has_temperature],
+            temperature_memberships[:, self.rule_temperature[has_temperature]],
+        )
+        matches = type_codes[:, None] == self.rule_plant_type[None, :]
+        matches &= (self.rule_time_of_day < 0) | (time_codes[:, None] == self.rule_time_of_day[None, :])
+        strength = np.where(matches, strength, 0.0)
+
+        # Степень активации каждого выходного терма: max по правилам с этим действием
+        term_strength = np.zeros((len(type_codes), len(self.rules_by_output)))
+        for code, rule_indices in enumerate(self.rules_by_output):
+            if rule_indices.size:
+                term_strength[:, code] = strength[:, rule_indices].max(axis=1)
+
+        # Агрегация усечённых термов и дефаззификация по центру тяжести
+        aggregated = np.minimum(term_strength[:, :, None], self.output_curves[None, :, :]).max(axis=1)
+        area = aggregated.sum(axis=1)
+        moment = aggregated @ self.universe
+        return np.divide(moment, area, out=np.zeros_like(area), where=area > 0)
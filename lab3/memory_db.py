@@ -0,0 +1,83 @@
+from kb_backend import KnowledgeBackend
+from knowledge_base import PLANT_TYPES, WATERING_RULES
+from rule_index import compile_rules
+
+
+class InMemoryDB(KnowledgeBackend):
+    def __init__(self, plant_types=PLANT_TYPES, watering_rules=WATERING_RULES):
+        """
+        Локальная база знаний в памяти, построенная напрямую из PLANT_TYPES и WATERING_RULES.
+        Не требует сети и драйвера Neo4j, отвечает на запросы поиском по словарю.
+        :param plant_types: Категории растений в формате PLANT_TYPES.
+        :param watering_rules: Правила полива в формате WATERING_RULES.
+        """
+        self.rules_version = 0
+        self.load(plant_types, watering_rules)
+
+    def load(self, plant_types, watering_rules):
+        """
+        Загружает категории растений и правила полива, заменяя текущие.
+        :param plant_types: Категории растений в формате PLANT_TYPES.
+        :param watering_rules: Правила полива в формате WATERING_RULES.
+        """
+        self._plants = {}
+        for plant_type, data in plant_types.items():
+            for plant in data["plants"]:
+                self._plants[plant] = {
+                    "name": plant,
+                    "category": plant_type,
+                    "growth_time_days": data["growth_time_days"],
+                }
+
+        # Правило без условий не попадает в граф Neo4j, поэтому пропускаем его и здесь
+        self._rules = [
+            {
+                "rule_name": rule["name"],
+                "rule_type": rule["type"],
+                "plant_type": rule["conditions"].get("plant_type"),
+                "humidity_level": rule["conditions"].get("humidity_level"),
+                "temperature": rule["conditions"].get("temperature"),
+                "time_of_day": rule["conditions"].get("time_of_day"),
+                "action_name": rule["action"],
+            }
+            for rule in watering_rules
+            if any(value is not None for value in rule["conditions"].values())
+        ]
+        self._basic, self._advanced = compile_rules(self._rules)
+        self.rules_version += 1
+
+    def get_plant_info(self, plant_name):
+        """
+        Ищет информацию о растении по имени.
+        :param plant_name: Название растения.
+        :return: Словарь с информацией о растении или None, если растение не найдено.
+        """
+        info = self._plants.get(plant_name)
+        return dict(info) if info else None
+
+    def fetch_basic_watering(self, plant_type, fuzzified_humidity):
+        """
+        Получает базовое правило полива.
+        :param plant_type: Тип растения.
+        :param fuzzified_humidity: Фаззифицированное значение влажности.
+        :return: Словарь с правилом и действием, либо None, если правило не найдено.
+        """
+        return self._basic.get((plant_type, fuzzified_humidity))
+
+    def fetch_advanced_watering(self, plant_type, fuzzified_humidity, fuzzified_temperature, time_of_day):
+        """
+        Получает углубленное правило полива.
+        :param plant_type: Тип растения.
+        :param fuzzified_humidity: Фаззифицированное значение влажности.
+        :param fuzzified_temperature: Фаззифицированное значение температуры.
+        :param time_of_day: Время суток.
+        :return: Словарь с правилом и действием, либо None, если правило не найдено.
+        """
+        return self._advanced.get((plant_type, fuzzified_humidity, fuzzified_temperature, time_of_day))
+
+    def fetch_all_rules(self):
+        """
+        Выгружает все правила полива вместе с условиями и действиями.
+        :return: Список словарей с описанием правил.
+        """
+        return [dict(rule) for rule in self._rules]
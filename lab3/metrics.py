@@ -0,0 +1,264 @@
+import cProfile
+import json
+import pstats
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+class _Timer:
+    __slots__ = ("metrics", "name", "labels", "started")
+
+    def __init__(self, metrics, name, labels):
+        self.metrics = metrics
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.metrics.observe(self.name, time.perf_counter() - self.started, **self.labels)
+        return False
+
+
+class Metrics:
+    def __init__(self, sinks=()):
+        """
+        Счётчики и таймеры горячих участков симуляции.
+        Значения хранятся по имени метрики и набору меток (например, query="basic_watering");
+        события тактов и итоговые значения передаются в подключаемые приёмники.
+        :param sinks: Приёмники с методами write(event) и flush(snapshot)
+                      (MemorySink, JsonLinesSink, PrometheusSink).
+        """
+        self.sinks = list(sinks)
+        self.counters = {}  # (имя, метки) -> значение
+        self.timers = {}  # (имя, метки) -> [количество, сумма секунд, максимум]
+        self._lock = threading.Lock()  # Метрики базы знаний могут обновляться из нескольких потоков
+
+    def increment(self, name, value=1, **labels):
+        """
+        Увеличивает счётчик.
+        """
+        key = _key(name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, seconds, **labels):
+        """
+        Добавляет измерение длительности.
+        """
+        key = _key(name, labels)
+        with self._lock:
+            timer = self.timers.get(key)
+            if timer is None:
+                self.timers[key] = [1, seconds, seconds]
+            else:
+                timer[0] += 1
+                timer[1] += seconds
+                if seconds > timer[2]:
+                    timer[2] = seconds
+
+    def timer(self, name, **labels):
+        """
+        Контекстный менеджер, замеряющий длительность блока.
+        """
+        return _Timer(self, name, labels)
+
+    def emit(self, event):
+        """
+        Передаёт событие (например, итог такта) во все приёмники.
+        :param event: Словарь, сериализуемый в JSON.
+        """
+        for sink in self.sinks:
+            sink.write(event)
+
+    def counter(self, name, **labels):
+        """
+        :return: Значение счётчика (0, если счётчика нет).
+        """
+        return self.counters.get(_key(name, labels), 0)
+
+    def shares(self, name, label):
+        """
+        Доли значений счётчика по одной метке, например доли базовых и углубленных правил.
+        :param name: Имя счётчика.
+        :param label: Имя метки.
+        :return: Словарь значение метки -> доля от суммы.
+        """
+        totals = {}
+        for (counter_name, labels), value in self.counters.items():
+            if counter_name == name:
+                value_label = dict(labels).get(label)
+                totals[value_label] = totals.get(value_label, 0) + value
+        overall = sum(totals.values())
+        return {key: value / overall for key, value in totals.items()} if overall else {}
+
+    def snapshot(self):
+        """
+        :return: Текущие значения всех счётчиков и таймеров в виде словаря.
+        """
+        return {
+            "counters": [
+                {"name": name, "labels": dict(labels), "value": value}
+                for (name, labels), value in self.counters.items()
+            ],
+            "timers": [
+                {"name": name, "labels": dict(labels), "count": count, "sum": total, "max": maximum}
+                for (name, labels), (count, total, maximum) in self.timers.items()
+            ],
+        }
+
+    def flush(self):
+        """
+        Передаёт текущие значения во все приёмники.
+        """
+        with self._lock:
+            snapshot = self.snapshot()
+        for sink in self.sinks:
+            sink.flush(snapshot)
+
+    def close(self):
+        """
+        Закрывает приёмники, у которых есть метод close (например, файл JsonLinesSink).
+        """
+        for sink in self.sinks:
+            close = getattr(sink, "close", None)
+            if close is not None:
+                close()
+
+    def reset(self):
+        """
+        Обнуляет все счётчики и таймеры.
+        """
+        with self._lock:
+            self.counters.clear()
+            self.timers.clear()
+
+
+def timed(metrics, name, **labels):
+    """
+    Таймер metrics либо пустой контекст, если метрики не подключены.
+    """
+    return metrics.timer(name, **labels) if metrics is not None else nullcontext()
+
+
+class MemorySink:
+    def __init__(self):
+        """
+        Приёмник, сохраняющий события и последний снимок метрик в памяти.
+        """
+        self.events = []
+        self.snapshot = None
+
+    def write(self, event):
+        self.events.append(event)
+
+    def flush(self, snapshot):
+        self.snapshot = snapshot
+
+
+class JsonLinesSink:
+    def __init__(self, path):
+        """
+        Приёмник, записывающий события и снимки метрик в файл построчно в формате JSON.
+        :param path: Путь к файлу (дописывается).
+        """
+        self.path = path
+        self._file = open(path, "a", encoding="utf-8")
+
+    def write(self, event):
+        self._file.write(json.dumps(event, ensure_ascii=False) + "\n")
+
+    def flush(self, snapshot):
+        self._file.write(json.dumps({"event": "snapshot", **snapshot}, ensure_ascii=False) + "\n")
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+def _prometheus_labels(labels):
+    if not labels:
+        return ""
+    escaped = (
+        (key, str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n"))
+        for key, value in labels.items()
+    )
+    return "{" + ",".join(f'{key}="{value}"' for key, value in escaped) + "}"
+
+
+def prometheus_text(snapshot, prefix="greenhouse_"):
+    """
+    Преобразует снимок метрик в текстовый формат Prometheus:
+    счётчики — counter, таймеры — summary (_count и _sum в секундах).
+    """
+    lines = []
+    declared = set()
+    # Строки одного семейства метрик должны идти подряд
+    for counter in sorted(snapshot["counters"], key=lambda item: item["name"]):
+        name = prefix + counter["name"]
+        if name not in declared:
+            declared.add(name)
+            lines.append(f"# TYPE {name} counter")
+        lines.append(f"{name}{_prometheus_labels(counter['labels'])} {counter['value']}")
+    for timer in sorted(snapshot["timers"], key=lambda item: item["name"]):
+        name = prefix + timer["name"]
+        if name not in declared:
+            declared.add(name)
+            lines.append(f"# TYPE {name} summary")
+        labels = _prometheus_labels(timer["labels"])
+        lines.append(f"{name}_count{labels} {timer['count']}")
+        lines.append(f"{name}_sum{labels} {timer['sum']:.9f}")
+    return "\n".join(lines) + "\n"
+
+
+class PrometheusSink:
+    def __init__(self, path, prefix="greenhouse_"):
+        """
+        Приёмник, перезаписывающий файл в текстовом формате Prometheus при каждом сбросе
+        (подходит для textfile-коллектора node_exporter). События тактов не сохраняются.
+        :param path: Путь к файлу.
+        :param prefix: Префикс имён метрик.
+        """
+        self.path = path
+        self.prefix = prefix
+
+    def write(self, event):
+        pass
+
+    def flush(self, snapshot):
+        with open(self.path, "w", encoding="utf-8") as file:
+            file.write(prometheus_text(snapshot, self.prefix))
+
+
+def sink_for_path(path):
+    """
+    Выбирает приёмник по расширению файла: .prom — Prometheus, иначе JSON lines.
+    """
+    return PrometheusSink(path) if path.endswith(".prom") else JsonLinesSink(path)
+
+
+@contextmanager
+def profiled(path=None, sort="cumulative", limit=30):
+    """
+    Профилирует блок через cProfile.
+    :param path: Файл для сохранения статистики (pstats); None — вывести сводку на экран.
+    :param sort: Ключ сортировки сводки.
+    :param limit: Количество строк сводки.
+    """
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        if path:
+            profiler.dump_stats(path)
+        else:
+            pstats.Stats(profiler).sort_stats(sort).print_stats(limit)
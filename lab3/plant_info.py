@@ -0,0 +1,63 @@
+from cache import MISSING, LRUCache
+
+
+class PlantInfoResolver:
+    def __init__(self, db, maxsize=4096, ttl=None):
+        """
+        Определение категорий растений с кэшированием, в том числе отрицательным:
+        неизвестные растения тоже запоминаются, чтобы не запрашивать их повторно.
+        Все отсутствующие в кэше названия запрашиваются одним пакетным запросом.
+        :param db: База знаний (должна поддерживать get_plant_info_batch).
+        :param maxsize: Максимальное количество записей в кэше.
+        :param ttl: Время жизни записи в секундах; None — записи не устаревают.
+        """
+        self.db = db
+        self.cache = LRUCache(maxsize=maxsize, ttl=ttl)
+
+    def _lookup(self, plant_names):
+        """
+        Ищет уникальные названия в кэше.
+        :return: Кортеж (найденные записи, названия, которых нет в кэше).
+        """
+        resolved = {}
+        missing = []
+        for name in dict.fromkeys(plant_names):
+            info = self.cache.get(name)
+            if info is MISSING:
+                missing.append(name)
+            else:
+                resolved[name] = info
+        return resolved, missing
+
+    def _complete(self, plant_names, resolved, fetched):
+        """
+        Сохраняет полученные записи в кэше и собирает результат в порядке ввода.
+        """
+        for name in fetched:
+            self.cache.put(name, fetched[name])
+        resolved.update(fetched)
+        return [resolved.get(name) for name in plant_names]
+
+    def resolve(self, plant_names):
+        """
+        Возвращает информацию о растениях.
+        :param plant_names: Список названий (допускаются повторы).
+        :return: Список словарей с информацией (None для неизвестных растений) в порядке ввода.
+        """
+        resolved, missing = self._lookup(plant_names)
+        fetched = self.db.get_plant_info_batch(missing) if missing else {}
+        return self._complete(plant_names, resolved, fetched)
+
+    async def resolve_async(self, plant_names):
+        """
+        Асинхронный вариант resolve для AsyncNeo4jDB.
+        """
+        resolved, missing = self._lookup(plant_names)
+        fetched = await self.db.get_plant_info_batch(missing) if missing else {}
+        return self._complete(plant_names, resolved, fetched)
+
+    def stats(self):
+        """
+        :return: Статистика кэша (попадания, промахи, вытеснения).
+        """
+        return self.cache.stats()
@@ -0,0 +1,182 @@
+import numpy as np
+
+from fuzzy_logic import calculate_humidity_decrease
+
+DEFAULT_ZONE = "основная"  # Зона теплицы для растений без явно заданной зоны
+
+
+class PlantStore:
+    def __init__(self, capacity=16):
+        """
+        Хранилище состояния растений в виде структуры массивов.
+        Каждое растение — индекс в массивах влажности, дней роста и кода типа,
+        поэтому рост, высыхание и сбор урожая выполняются одной векторной операцией.
+        :param capacity: Начальный размер массивов (увеличивается по мере добавления растений).
+        """
+        self.size = 0
+        self.names = []
+        self.type_names = []  # Код типа -> название типа
+        self._type_codes = {}
+        self.zone_names = []  # Код зоны -> название зоны (у каждой зоны свой датчик температуры)
+        self._zone_codes = {}
+        self.humidity = np.zeros(capacity, dtype=np.float64)
+        self.current_days = np.zeros(capacity, dtype=np.int64)
+        self.growth_days = np.zeros(capacity, dtype=np.int64)
+        self.plant_type = np.zeros(capacity, dtype=np.int32)
+        self.zone = np.zeros(capacity, dtype=np.int32)
+        self.alive = np.zeros(capacity, dtype=bool)
+
+    def _reserve(self, capacity):
+        """
+        Увеличивает размер массивов не меньше чем до capacity.
+        """
+        if capacity <= len(self.humidity):
+            return
+        capacity = max(capacity, 2 * len(self.humidity))
+        for field in ("humidity", "current_days", "growth_days", "plant_type", "zone", "alive"):
+            old = getattr(self, field)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:self.size] = old[:self.size]
+            setattr(self, field, new)
+
+    def type_code(self, plant_type):
+        """
+        Возвращает код типа растения, регистрируя новый тип при необходимости.
+        """
+        code = self._type_codes.get(plant_type)
+        if code is None:
+            code = len(self.type_names)
+            self._type_codes[plant_type] = code
+            self.type_names.append(plant_type)
+        return code
+
+    def zone_code(self, zone):
+        """
+        Возвращает код зоны, регистрируя новую зону при необходимости.
+        """
+        code = self._zone_codes.get(zone)
+        if code is None:
+            code = len(self.zone_names)
+            self._zone_codes[zone] = code
+            self.zone_names.append(zone)
+        return code
+
+    def add(self, name, plant_type, growth_days, humidity=100, zone=DEFAULT_ZONE):
+        """
+        Добавляет растение.
+        :param name: Название растения.
+        :param plant_type: Тип растения.
+        :param growth_days: Время роста в днях.
+        :param humidity: Начальная влажность.
+        :param zone: Зона теплицы.
+        :return: Индекс растения в хранилище.
+        """
+        self._reserve(self.size + 1)
+        index = self.size
+        self.names.append(name)
+        self.humidity[index] = humidity
+        self.current_days[index] = 0
+        self.growth_days[index] = growth_days
+        self.plant_type[index] = self.type_code(plant_type)
+        self.zone[index] = self.zone_code(zone)
+        self.alive[index] = True
+        self.size += 1
+        return index
+
+    def alive_indices(self):
+        """
+        :return: Индексы ещё растущих растений.
+        """
+        return np.flatnonzero(self.alive[:self.size])
+
+    def alive_count(self):
+        """
+        :return: Количество ещё растущих растений.
+        """
+        return int(np.count_nonzero(self.alive[:self.size]))
+
+    def dry(self, decrease, indices=None):
+        """
+        Уменьшает влажность растущих растений; влажность не может быть отрицательной.
+        :param decrease: Уменьшение влажности (число или массив по indices).
+        :param indices: Индексы растений; None — все растущие.
+        """
+        if indices is None:
+            indices = self.alive_indices()
+        self.humidity[indices] = np.maximum(0, self.humidity[indices] - decrease)
+
+    def water(self, indices, amounts):
+        """
+        Увеличивает влажность растений; влажность не должна превышать 100%.
+        :param indices: Индексы растений.
+        :param amounts: Полив для каждого растения.
+        """
+        self.humidity[indices] = np.minimum(100, self.humidity[indices] + amounts)
+
+    def grow(self):
+        """
+        Увеличивает количество дней роста у растущих растений и собирает выросшие.
+        :return: Индексы растений, выросших на этом шаге.
+        """
+        alive = self.alive[:self.size]
+        self.current_days[:self.size][alive] += 1
+        harvested = alive & (self.current_days[:self.size] >= self.growth_days[:self.size])
+        alive[harvested] = False
+        return np.flatnonzero(harvested)
+
+
+class Plant:
+    __slots__ = ("store", "index")
+
+    def __init__(self, store, index):
+        """
+        Лёгкое представление одного растения из PlantStore.
+        :param store: Хранилище растений.
+        :param index: Индекс растения в хранилище.
+        """
+        self.store = store
+        self.index = index
+
+    @property
+    def name(self):
+        return self.store.names[self.index]
+
+    @property
+    def plant_type(self):
+        return self.store.type_names[self.store.plant_type[self.index]]
+
+    @property
+    def zone(self):
+        return self.store.zone_names[self.store.zone[self.index]]
+
+    @property
+    def growth_days(self):
+        return int(self.store.growth_days[self.index])
+
+    @property
+    def current_days(self):
+        return int(self.store.current_days[self.index])
+
+    @property
+    def humidity(self):
+        return float(self.store.humidity[self.index])
+
+    @humidity.setter
+    def humidity(self, value):
+        self.store.humidity[self.index] = value
+
+    @property
+    def alive(self):
+        return bool(self.store.alive[self.index])
+
+    def grow(self):
+        """Увеличивает количество дней роста."""
+        self.store.current_days[self.index] += 1
+        return self.current_days >= self.growth_days
+
+    def update_humidity(self, temperature):
+        """
+        Уменьшает влажность, используя фаззификацию температуры.
+        :param temperature: Текущая температура в теплице.
+        """
+        self.store.dry(calculate_humidity_decrease(temperature), [self.index])
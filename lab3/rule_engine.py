@@ -1,13 +1,101 @@
+import asyncio
+import inspect
+import logging
+
+from cache import MISSING, LRUCache
 from fuzzy_logic import fuzzify_temperature, fuzzify_humidity, defuzzify_watering
+from mamdani import MamdaniInference
+from metrics import timed
+from rule_index import RuleIndex
+
+INFERENCE_MODES = ("crisp", "mamdani")
+
+logger = logging.getLogger(__name__)
+
+
+async def _resolve(value):
+    """
+    Дожидается результата, если база знаний асинхронная, иначе возвращает значение как есть.
+    """
+    if inspect.isawaitable(value):
+        return await value
+    return value
 
 
 class RuleEngine:
-    def __init__(self, db_driver):
+    def __init__(self, db_driver, use_index=False, inference="crisp",
+                 cache_decisions=False, cache_size=1024, cache_ttl=None, metrics=None):
         """
         Конструктор RuleEngine
         :param db_driver: Экземпляр класса, отвечающего за подключение к Neo4j
+        :param use_index: Искать правила в индексе в памяти вместо запросов к базе
+        :param inference: Режим вывода: "crisp" — первое подходящее правило по максимальной принадлежности,
+                          "mamdani" — нечеткий вывод по всем правилам с дефаззификацией по центру тяжести
+        :param cache_decisions: Запоминать решения четкого режима по ключу
+                                (тип растения, метка влажности, метка температуры, время суток)
+        :param cache_size: Максимальное количество запомненных решений
+        :param cache_ttl: Время жизни решения в секундах; None — без ограничения
+        :param metrics: Экземпляр Metrics для учёта исходов правил и времени этапов; None — без учёта
         """
+        if inference not in INFERENCE_MODES:
+            raise ValueError(f"Неизвестный режим вывода: {inference}")
         self.db_driver = db_driver
+        self.rule_index = RuleIndex(db_driver) if use_index else None
+        self.rules = self.rule_index if use_index else db_driver
+        self.inference = inference
+        self._mamdani = None
+        self._mamdani_version = None
+        self.decision_cache = LRUCache(maxsize=cache_size, ttl=cache_ttl) if cache_decisions else None
+        self._decision_version = getattr(db_driver, "rules_version", 0)
+        self.metrics = metrics
+
+    def invalidate_decisions(self):
+        """
+        Сбрасывает кэш решений (например, после изменения правил в базе).
+        """
+        if self.decision_cache is not None:
+            self.decision_cache.invalidate()
+
+    def decision_cache_stats(self):
+        """
+        :return: Статистика кэша решений (попадания, промахи, вытеснения) или None, если кэш выключен.
+        """
+        return self.decision_cache.stats() if self.decision_cache is not None else None
+
+    def _cached_decision(self, key, count=1):
+        """
+        Ищет решение в кэше; кэш сбрасывается, если правила в базе изменились.
+        :param count: Количество растений с этим состоянием (для метрик).
+        :return: Закэшированное увеличение влажности или MISSING.
+        """
+        if self.decision_cache is None:
+            return MISSING
+        version = getattr(self.db_driver, "rules_version", 0)
+        if version != self._decision_version:
+            self.decision_cache.invalidate()
+            self._decision_version = version
+        decision = self.decision_cache.get(key)
+        if decision is not MISSING and self.metrics is not None:
+            self.metrics.increment("rule_outcomes_total", count, outcome="cached")
+        return decision
+
+    def _remember(self, key, decision):
+        """
+        Сохраняет решение в кэше (если он включён) и возвращает его.
+        """
+        if self.decision_cache is not None:
+            self.decision_cache.put(key, decision)
+        return decision
+
+    def _get_mamdani(self):
+        """
+        Возвращает движок нечеткого вывода, перестраивая его при изменении правил в базе.
+        """
+        version = getattr(self.db_driver, "rules_version", 0)
+        if self._mamdani is None or self._mamdani_version != version:
+            self._mamdani = MamdaniInference(self.db_driver.fetch_all_rules())
+            self._mamdani_version = version
+        return self._mamdani
 
     def process_watering(self, plant_type, temperature, humidity, time_of_day):
         """
@@ -18,28 +106,214 @@ class RuleEngine:
         :param time_of_day: Время суток (строка)
         :return: Увеличение влажности (float)
         """
+        if self.inference == "mamdani":
+            additional_humidity = self._get_mamdani().infer(plant_type, temperature, humidity, time_of_day)
+            logger.info("Нечеткий вывод (Мамдани): полив = %.2f", additional_humidity)
+            return additional_humidity
+
         # Фаззификация температуры и влажности
-        fuzzified_temperature = fuzzify_temperature(temperature)
-        fuzzified_humidity = fuzzify_humidity(humidity)
+        with timed(self.metrics, "rule_engine_seconds", phase="fuzzify"):
+            fuzzified_temperature = fuzzify_temperature(temperature)
+            fuzzified_humidity = fuzzify_humidity(humidity)
+
+        # Повторное состояние: решение берётся из кэша без обращения к базе
+        key = (plant_type, fuzzified_humidity, fuzzified_temperature, time_of_day)
+        decision = self._cached_decision(key)
+        if decision is not MISSING:
+            return decision
 
-        print(f"Фаззифицированные данные: температура = {fuzzified_temperature}, влажность = {fuzzified_humidity}")
+        logger.info("Фаззифицированные данные: температура = %s, влажность = %s",
+                    fuzzified_temperature, fuzzified_humidity)
 
         # Первичная проверка базовых правил
-        basic_rule = self.db_driver.fetch_basic_watering(plant_type, fuzzified_humidity)
+        with timed(self.metrics, "rule_engine_seconds", phase="basic_query"):
+            basic_rule = self.rules.fetch_basic_watering(plant_type, fuzzified_humidity)
         if basic_rule:
-            print(f"Базовое правило применено: {basic_rule['rule_name']} — Действие: {basic_rule['action_name']}")
-            return defuzzify_watering(basic_rule["action_name"])
+            return self._remember(key, self._apply_rule(basic_rule, None))
 
         # Углубленная проверка дополнительных условий
-        advanced_rule = self.db_driver.fetch_advanced_watering(
+        with timed(self.metrics, "rule_engine_seconds", phase="advanced_query"):
+            advanced_rule = self.rules.fetch_advanced_watering(
+                plant_type,
+                fuzzified_humidity,
+                fuzzified_temperature,
+                time_of_day,
+            )
+        return self._remember(key, self._apply_rule(None, advanced_rule))
+
+    async def _prepare_async(self):
+        """
+        Загружает индекс правил и движок Мамдани из асинхронной базы знаний, если они устарели.
+        """
+        version = getattr(self.db_driver, "rules_version", 0)
+        if self.rule_index is not None and self.rule_index.is_stale():
+            self.rule_index.load(await _resolve(self.db_driver.fetch_all_rules()))
+        if self.inference == "mamdani" and (self._mamdani is None or self._mamdani_version != version):
+            self._mamdani = MamdaniInference(await _resolve(self.db_driver.fetch_all_rules()))
+            self._mamdani_version = version
+
+    async def process_watering_async(self, plant_type, temperature, humidity, time_of_day, count=1):
+        """
+        Асинхронный вариант process_watering для работы с AsyncNeo4jDB
+        :param plant_type: Тип растения
+        :param temperature: Текущая температура (int)
+        :param humidity: Текущая влажность (int)
+        :param time_of_day: Время суток (строка)
+        :param count: Количество растений с этим состоянием (для метрик)
+        :return: Увеличение влажности (float)
+        """
+        await self._prepare_async()
+        if self.inference == "mamdani":
+            return self.process_watering(plant_type, temperature, humidity, time_of_day)
+
+        fuzzified_temperature = fuzzify_temperature(temperature)
+        fuzzified_humidity = fuzzify_humidity(humidity)
+        key = (plant_type, fuzzified_humidity, fuzzified_temperature, time_of_day)
+        decision = self._cached_decision(key, count)
+        if decision is not MISSING:
+            return decision
+
+        logger.info("Фаззифицированные данные: температура = %s, влажность = %s",
+                    fuzzified_temperature, fuzzified_humidity)
+
+        basic_rule = await _resolve(self.rules.fetch_basic_watering(plant_type, fuzzified_humidity))
+        if basic_rule:
+            return self._remember(key, self._apply_rule(basic_rule, None, count))
+
+        advanced_rule = await _resolve(self.rules.fetch_advanced_watering(
             plant_type,
             fuzzified_humidity,
             fuzzified_temperature,
             time_of_day,
-        )
+        ))
+        return self._remember(key, self._apply_rule(None, advanced_rule, count))
+
+    async def process_watering_concurrent(self, states, concurrency=32, weights=None):
+        """
+        Обрабатывает состояния растений конкурентно: запросы к базе выполняются одновременно,
+        но не более concurrency штук сразу
+        :param states: Список кортежей (тип растения, температура, влажность, время суток)
+        :param concurrency: Максимальное число одновременных запросов
+        :param weights: Количество растений для каждого состояния (для метрик); None — по одному
+        :return: Список увеличений влажности (float) в порядке состояний
+        """
+        await self._prepare_async()
+        semaphore = asyncio.Semaphore(concurrency)
+        weights = weights if weights is not None else [1] * len(states)
+
+        async def process(state, count):
+            async with semaphore:
+                return await self.process_watering_async(*state, count=count)
+
+        return list(await asyncio.gather(*(process(state, count) for state, count in zip(states, weights))))
+
+    def process_watering_batch(self, states, weights=None):
+        """
+        Обрабатывает состояния всех растений за один такт одним запросом к базе знаний
+        :param states: Список кортежей (тип растения, температура, влажность, время суток)
+        :param weights: Количество растений для каждого состояния (для метрик); None — по одному
+        :return: Список увеличений влажности (float) в порядке состояний
+        """
+        weights = weights if weights is not None else [1] * len(states)
+        if self.inference == "mamdani":
+            plant_types, temperatures, humidities, times_of_day = zip(*states) if states else ((), (), (), ())
+            with timed(self.metrics, "rule_engine_seconds", phase="mamdani"):
+                results = self._get_mamdani().infer_batch(plant_types, temperatures, humidities, times_of_day).tolist()
+            if self.metrics is not None:
+                self.metrics.increment("rule_outcomes_total", sum(weights), outcome="mamdani")
+            if logger.isEnabledFor(logging.INFO):
+                for additional_humidity in results:
+                    logger.info("Нечеткий вывод (Мамдани): полив = %.2f", additional_humidity)
+            return results
+
+        # Фаззификация и сбор уникальных состояний: одинаковые растения дают один запрос
+        keys = []
+        unique_states = {}
+        with timed(self.metrics, "rule_engine_seconds", phase="fuzzify"):
+            for (plant_type, temperature, humidity, time_of_day), count in zip(states, weights):
+                fuzzified_temperature = fuzzify_temperature(temperature)
+                fuzzified_humidity = fuzzify_humidity(humidity)
+                key = (plant_type, fuzzified_humidity, fuzzified_temperature, time_of_day)
+                keys.append(key)
+                unique_states[key] = unique_states.get(key, 0) + count
+
+        # Решения для повторных состояний берутся из кэша, в базу уходят только остальные
+        decisions = {}
+        for key, count in unique_states.items():
+            decision = self._cached_decision(key, count)
+            if decision is not MISSING:
+                decisions[key] = decision
+        missing = [key for key in unique_states if key not in decisions]
+
+        query_states = [
+            {
+                "plant_type": plant_type,
+                "humidity_level": fuzzified_humidity,
+                "temperature": fuzzified_temperature,
+                "time_of_day": time_of_day,
+            }
+            for plant_type, fuzzified_humidity, fuzzified_temperature, time_of_day in missing
+        ]
+        rules = {}
+        if missing:
+            with timed(self.metrics, "rule_engine_seconds", phase="batch_query"):
+                rules = dict(zip(missing, self.rules.fetch_watering_batch(query_states)))
+
+        results = []
+        for key, count in zip(keys, weights):
+            if key in rules:
+                logger.info("Фаззифицированные данные: температура = %s, влажность = %s", key[2], key[1])
+                decisions[key] = self._remember(key, self._apply_rule(*rules[key], count))
+            results.append(decisions[key])
+        return results
+
+    def _apply_rule(self, basic_rule, advanced_rule, count=1):
+        """
+        Применяет найденное правило с учётом приоритета базовых правил над углубленными
+        :param basic_rule: Базовое правило или None
+        :param advanced_rule: Углубленное правило или None
+        :param count: Количество растений, к которым применяется правило (для метрик)
+        :return: Увеличение влажности (float)
+        """
+        if basic_rule:
+            self._record_outcome("basic", basic_rule, count)
+            logger.info("Базовое правило применено: %s — Действие: %s",
+                        basic_rule["rule_name"], basic_rule["action_name"])
+            return defuzzify_watering(basic_rule["action_name"])
+
         if advanced_rule:
-            print(f"Углубленное правило применено: {advanced_rule['rule_name']} — Действие: {advanced_rule['action_name']}")
+            self._record_outcome("advanced", advanced_rule, count)
+            logger.info("Углубленное правило применено: %s — Действие: %s",
+                        advanced_rule["rule_name"], advanced_rule["action_name"])
             return defuzzify_watering(advanced_rule["action_name"])
 
-        print("Нет применимых правил для текущих условий.")
+        self._record_outcome("none", None, count)
+        logger.info("Нет применимых правил для текущих условий.")
         return 0  # Если правил нет, возвращаем нулевую добавку к влажности
+
+    def _record_outcome(self, outcome, rule, count=1):
+        """
+        Учитывает исход выбора правила (basic, advanced, none) и срабатывание правила по имени
+        для count растений.
+        """
+        if self.metrics is None:
+            return
+        self.metrics.increment("rule_outcomes_total", count, outcome=outcome)
+        if rule is not None:
+            self.metrics.increment("rule_hits_total", count, rule=rule["rule_name"])
+
+    def rule_stats(self):
+        """
+        :return: Доли исходов выбора правил и количество срабатываний каждого правила
+                 или None, если метрики не подключены.
+        """
+        if self.metrics is None:
+            return None
+        return {
+            "outcomes": self.metrics.shares("rule_outcomes_total", "outcome"),
+            "rule_hits": {
+                dict(labels)["rule"]: value
+                for (name, labels), value in self.metrics.counters.items()
+                if name == "rule_hits_total"
+            },
+        }
@@ -0,0 +1,100 @@
+def compile_rules(rules):
+    """
+    Компилирует список правил в таблицы поиска.
+    Если несколько правил подходят под одни и те же условия, сохраняется первое.
+    :param rules: Список словарей с описанием правил (см. Neo4jDB.fetch_all_rules).
+    :return: Кортеж (базовые правила, углубленные правила).
+    """
+    basic = {}
+    advanced = {}
+    for rule in rules:
+        decision = {"rule_name": rule["rule_name"], "action_name": rule["action_name"]}
+        if rule["rule_type"] == "basic":
+            key = (rule["plant_type"], rule["humidity_level"])
+            basic.setdefault(key, decision)
+        elif rule["rule_type"] == "advanced":
+            key = (rule["plant_type"], rule["humidity_level"], rule["temperature"], rule["time_of_day"])
+            advanced.setdefault(key, decision)
+    return basic, advanced
+
+
+class RuleIndex:
+    def __init__(self, db_driver, lazy=True):
+        """
+        Индекс правил полива в памяти.
+        Правила загружаются из базы знаний один раз и затем ищутся по словарю,
+        без обращения к базе на каждый запрос.
+        :param db_driver: Источник правил (должен поддерживать fetch_all_rules).
+        :param lazy: Если False, правила загружаются сразу при создании индекса.
+        """
+        self.db_driver = db_driver
+        self.version = None
+        self._basic = {}
+        self._advanced = {}
+        if not lazy:
+            self.refresh()
+
+    def refresh(self):
+        """
+        Перезагружает правила из базы знаний.
+        """
+        self.load(self.db_driver.fetch_all_rules())
+
+    def load(self, rules):
+        """
+        Строит индекс из уже полученного списка правил (например, из асинхронной базы знаний).
+        :param rules: Список правил в формате fetch_all_rules.
+        """
+        self._basic, self._advanced = compile_rules(rules)
+        self.version = getattr(self.db_driver, "rules_version", 0)
+
+    def is_stale(self):
+        """
+        True, если индекс ещё не загружен или правила в базе изменились.
+        """
+        return self.version is None or self.version != getattr(self.db_driver, "rules_version", 0)
+
+    def _ensure_fresh(self):
+        """
+        Загружает индекс при первом обращении и перезагружает его, если правила в базе изменились.
+        """
+        if self.is_stale():
+            self.refresh()
+
+    def fetch_basic_watering(self, plant_type, fuzzified_humidity):
+        """
+        Ищет базовое правило полива в индексе.
+        :param plant_type: Тип растения.
+        :param fuzzified_humidity: Фаззифицированное значение влажности.
+        :return: Словарь с правилом и действием, либо None, если правило не найдено.
+        """
+        self._ensure_fresh()
+        return self._basic.get((plant_type, fuzzified_humidity))
+
+    def fetch_advanced_watering(self, plant_type, fuzzified_humidity, fuzzified_temperature, time_of_day):
+        """
+        Ищет углубленное правило полива в индексе.
+        :param plant_type: Тип растения.
+        :param fuzzified_humidity: Фаззифицированное значение влажности.
+        :param fuzzified_temperature: Фаззифицированное значение температуры.
+        :param time_of_day: Время суток.
+        :return: Словарь с правилом и действием, либо None, если правило не найдено.
+        """
+        self._ensure_fresh()
+        return self._advanced.get((plant_type, fuzzified_humidity, fuzzified_temperature, time_of_day))
+
+    def fetch_watering_batch(self, states):
+        """
+        Ищет базовые и углубленные правила полива для набора состояний.
+        :param states: Список словарей с ключами plant_type, humidity_level, temperature, time_of_day.
+        :return: Список пар (базовое правило, углубленное правило) в порядке состояний.
+        """
+        self._ensure_fresh()
+        return [
+            (
+                self._basic.get((state["plant_type"], state["humidity_level"])),
+                self._advanced.get((state["plant_type"], state["humidity_level"],
+                                    state["temperature"], state["time_of_day"])),
+            )
+            for state in states
+        ]
@@ -0,0 +1,121 @@
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from greenhouse import Greenhouse, spawn_generators
+from plant_info import PlantInfoResolver
+from simulator import create_db
+
+_worker_db = None  # База знаний рабочего процесса, создаётся один раз при запуске процесса
+_worker_plant_info = None  # Общий для теплиц процесса кэш категорий растений
+
+
+def _init_worker(backend):
+    """
+    Инициализация рабочего процесса: собственное подключение к базе знаний.
+    :param backend: Тип базы знаний ("neo4j" или "memory").
+    """
+    global _worker_db, _worker_plant_info
+    _worker_db = create_db(backend)
+    _worker_plant_info = PlantInfoResolver(_worker_db)
+
+
+def run_greenhouse(config):
+    """
+    Запускает симуляцию одной теплицы в рабочем процессе.
+    :param config: Словарь с ключами name, plants (список или строка через пробел),
+                   seed, max_ticks, inference, cache_decisions и необязательным rng
+                   (numpy.random.Generator, выданный run_batch; иначе генератор создаётся по seed).
+    :return: Сводка по симуляции.
+    """
+    plants = config["plants"]
+    if isinstance(plants, str):
+        plants = plants.split()
+
+    rng = config.get("rng") or np.random.default_rng(config.get("seed"))
+    started = time.perf_counter()
+    greenhouse = Greenhouse(_worker_db, plants, use_rule_index=True,
+                            inference=config.get("inference", "crisp"), plant_info=_worker_plant_info,
+                            cache_decisions=config.get("cache_decisions", True), rng=rng)
+    result = greenhouse.run_simulation(headless=True, max_ticks=config.get("max_ticks"), history=False)
+
+    summary = result.summary()
+    summary["name"] = config.get("name")
+    summary["seed"] = config.get("seed")
+    summary["completed"] = result.completed
+    summary["elapsed"] = time.perf_counter() - started
+    summary["worker"] = os.getpid()
+    summary["decision_cache"] = greenhouse.rule_engine.decision_cache_stats()
+    return summary
+
+
+def aggregate(summaries):
+    """
+    Объединяет сводки отдельных теплиц в общий отчёт.
+    :param summaries: Список сводок run_greenhouse.
+    :return: Словарь с итогами и сводками по каждой теплице.
+    """
+    return {
+        "greenhouses": len(summaries),
+        "plants": sum(summary["plants"] for summary in summaries),
+        "ticks": sum(summary["ticks"] for summary in summaries),
+        "harvested": sum(summary["harvested"] for summary in summaries),
+        "completed": sum(1 for summary in summaries if summary["completed"]),
+        "total_watering": sum(summary["total_watering"] for summary in summaries),
+        "workers": len({summary["worker"] for summary in summaries}),
+        "runs": summaries,
+    }
+
+
+def run_batch(configs, backend="memory", workers=None, seed=None):
+    """
+    Распределяет симуляции теплиц по пулу процессов.
+    :param configs: Список конфигураций теплиц (см. run_greenhouse).
+    :param backend: Тип базы знаний для рабочих процессов.
+    :param workers: Количество процессов; None — по числу ядер.
+    :param seed: Общее зерно пакета: теплицам без собственного seed выдаются независимые
+                 потоки, порождённые из него, поэтому результат не зависит от числа процессов.
+    :return: Общий отчёт (см. aggregate).
+    """
+    if seed is not None:
+        configs = [
+            config if config.get("seed") is not None else dict(config, rng=rng)
+            for config, rng in zip(configs, spawn_generators(seed, len(configs)))
+        ]
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(backend,)) as executor:
+        summaries = list(executor.map(run_greenhouse, configs))
+    report = aggregate(summaries)
+    report["elapsed"] = time.perf_counter() - started
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Параллельный запуск симуляций нескольких теплиц")
+    parser.add_argument("configs", help="JSON-файл со списком конфигураций теплиц")
+    parser.add_argument("--backend", choices=["neo4j", "memory"], default="memory",
+                        help="База знаний рабочих процессов")
+    parser.add_argument("--workers", type=int, default=None, help="Количество процессов")
+    parser.add_argument("--output", default=None, help="Файл для сохранения отчёта (JSON)")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="Общее зерно для теплиц без собственного seed")
+    args = parser.parse_args()
+
+    with open(args.configs, "r", encoding="utf-8") as file:
+        configs = json.load(file)
+
+    report = run_batch(configs, backend=args.backend, workers=args.workers, seed=args.seed)
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(text)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
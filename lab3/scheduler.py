@@ -0,0 +1,236 @@
+import bisect
+import heapq
+import logging
+
+import numpy as np
+
+from fuzzy_logic import (
+    FUZZY_REGISTRY,
+    calculate_humidity_decrease_array,
+    defuzzify_watering,
+    fuzzify_temperature_array,
+)
+from plant_store import DEFAULT_ZONE
+from simulation_result import TIME_CYCLE
+
+logger = logging.getLogger(__name__)
+
+
+class EventScheduler:
+    def __init__(self, greenhouse):
+        """
+        Событийная симуляция теплицы в четком режиме.
+        Между поливами влажность растения зависит только от накопленного высыхания:
+        h_t = max(0, h_e - (C[t] - C[e])), где C — накопленная сумма уменьшений влажности,
+        e — такт последнего полива. Поэтому такты, на которых метка влажности растения
+        не меняется и правила не дают полива, можно пропустить: для каждой группы одинаковых
+        растений (тип и влажность) в очереди с приоритетом хранится ближайший такт, на котором
+        растение пересекает границу метки влажности или получает полив; сбор урожая
+        вычисляется заранее по числу ночей.
+        :param greenhouse: Теплица (Greenhouse) с четким режимом вывода.
+        """
+        if greenhouse.rule_engine.inference != "crisp":
+            raise ValueError("Событийная симуляция поддерживает только четкий режим вывода")
+        if len(greenhouse.store.zone_names) > 1:
+            raise ValueError("Событийная симуляция поддерживает только теплицу с одной зоной")
+        self.greenhouse = greenhouse
+        self.humidity_variable = FUZZY_REGISTRY["Влажность"]
+        # Нижние границы областей постоянной метки влажности (влажность не бывает отрицательной)
+        points = self.humidity_variable.breakpoints()
+        self.breakpoints = [0.0] + points[points > 0].tolist()
+        self._humidity_codes = {label: code for code, label in enumerate(self.humidity_variable.labels)}
+
+    def _humidity_code(self, humidity):
+        return self._humidity_codes[self.humidity_variable.fuzzify(humidity)]
+
+    def _watering_table(self, temperature_codes, time_codes):
+        """
+        Полив для всех сочетаний (тип растения, метка влажности, метка температуры, время суток),
+        развёрнутый по тактам: таблица типы x метки влажности x такты.
+        Правила запрашиваются одним пакетным запросом, порядок применения — как в RuleEngine.
+        """
+        store = self.greenhouse.store
+        temperature_labels = FUZZY_REGISTRY["Температура"].labels
+        combinations = [
+            (plant_type, humidity_label, temperature_label, time_of_day)
+            for plant_type in store.type_names
+            for humidity_label in self.humidity_variable.labels
+            for temperature_label in temperature_labels
+            for time_of_day in TIME_CYCLE
+        ]
+        rules = self.greenhouse.rule_engine.rules.fetch_watering_batch([
+            {"plant_type": plant_type, "humidity_level": humidity, "temperature": temperature, "time_of_day": time}
+            for plant_type, humidity, temperature, time in combinations
+        ]) if combinations else []
+
+        table = np.array([
+            defuzzify_watering((basic_rule or advanced_rule)["action_name"]) if basic_rule or advanced_rule else 0
+            for basic_rule, advanced_rule in rules
+        ], dtype=float).reshape(len(store.type_names), len(self.humidity_variable.labels),
+                                len(temperature_labels), len(TIME_CYCLE))
+        return table[:, :, temperature_codes, time_codes]
+
+    def _exit_tick(self, cumulative, humidity, base, base_tick):
+        """
+        Первый такт, на котором влажность покидает область постоянной метки.
+        :param cumulative: Накопленное высыхание с нулём в начале (C[t + 1] — после такта t), список.
+        :param humidity: Текущая влажность (после высыхания).
+        :param base: Влажность после последнего полива.
+        :param base_tick: Такт последнего полива (-1 — начало симуляции).
+        :return: Номер такта или None, если влажность больше не сменит метку.
+        """
+        if humidity <= 0:
+            return None
+        breakpoints = self.breakpoints
+        position = bisect.bisect_left(breakpoints, humidity)
+        if position < len(breakpoints) and breakpoints[position] == humidity:
+            # Влажность ровно в точке границы: метка сменится при любом уменьшении
+            index = bisect.bisect_right(cumulative, cumulative[base_tick + 1] + base - humidity)
+        else:
+            index = bisect.bisect_left(cumulative, cumulative[base_tick + 1] + base - breakpoints[position - 1])
+        return index - 1 if index < len(cumulative) else None
+
+    def run(self, max_ticks=None, history=True):
+        """
+        Запускает событийную симуляцию; результат совпадает с run_simulation в четком режиме.
+        Показания датчика читаются заранее на весь бюджет тактов одним вызовом read_ticks
+        (или до конца потока показаний).
+        :param max_ticks: Бюджет тактов; None — до созревания всех растений.
+        :param history: Сохранять ли временные ряды по каждому растению.
+        :return: SimulationResult.
+        """
+        greenhouse = self.greenhouse
+        store = greenhouse.store
+        result = greenhouse._start_run(max_ticks, history)
+        budget = result.max_ticks
+        start = TIME_CYCLE.index(greenhouse.time_of_day)
+
+        # Показания на весь бюджет одним вызовом; поток может закончиться раньше
+        temperatures = greenhouse.sensor.read_ticks(store.zone_names or [DEFAULT_ZONE], budget)[:, 0]
+        if len(temperatures) < budget:
+            logger.info("Показания датчиков закончились на такте %s.", len(temperatures))
+        budget = len(temperatures)
+        ticks = np.arange(budget)
+        time_codes = (start + ticks) % len(TIME_CYCLE)
+        cumulative = np.concatenate(([0.0], np.cumsum(calculate_humidity_decrease_array(temperatures))))
+
+        # Сбор урожая: рост происходит при каждой смене на ночь
+        alive = store.alive_indices()
+        remaining = np.maximum(store.growth_days[alive] - store.current_days[alive], 1)
+        harvest = (len(TIME_CYCLE) - 1 - start) % len(TIME_CYCLE) + len(TIME_CYCLE) * (remaining - 1)
+        harvested = harvest < budget
+        if alive.size and np.all(harvested):
+            total_ticks = int(harvest.max()) + 1
+        else:
+            total_ticks = budget if alive.size else 0
+        ends = np.where(harvested, harvest + 1, total_ticks)  # Такт, с которого растение не обрабатывается
+
+        _, temperature_codes = fuzzify_temperature_array(temperatures)
+        watering_table = self._watering_table(temperature_codes, time_codes)
+        active = {}  # (тип, метка влажности) -> такты с ненулевым поливом
+
+        # Одинаковые по типу и влажности растения проходят одинаковую траекторию
+        keys = np.stack([store.plant_type[alive].astype(float), store.humidity[alive]], axis=1)
+        cohorts, inverse = np.unique(keys, axis=0, return_inverse=True)
+        order = np.argsort(inverse.reshape(-1), kind="stable")
+        splits = np.cumsum(np.bincount(inverse.reshape(-1), minlength=len(cohorts)))[:-1]
+        members = np.split(alive[order], splits)
+        cohort_ends = np.split(ends[order], splits)
+        member_ends = [np.sort(group).tolist() for group in cohort_ends]
+        bases = [[(float(humidity), -1)] for _, humidity in cohorts]  # (влажность после полива, такт)
+        events = [[] for _ in cohorts]  # (такт, полив)
+        watering_total = np.zeros(total_ticks)
+
+        # Основной цикл работает со списками: скалярные операции numpy здесь дороже bisect
+        drying = cumulative.tolist()
+        rows = watering_table.tolist()  # Тип -> метка влажности -> полив по тактам
+        type_codes = cohorts[:, 0].astype(int).tolist()
+        queue = [(0, cohort) for cohort in range(len(cohorts)) if total_ticks > 0]
+        heapq.heapify(queue)
+        event_count = 0
+        while queue:
+            tick, cohort = heapq.heappop(queue)
+            event_count += 1
+            type_code = type_codes[cohort]
+            base, base_tick = bases[cohort][-1]
+            ends_sorted = member_ends[cohort]
+
+            # Состояние на такте события: высыхание и полив, как в обычном такте
+            humidity = max(0.0, base - (drying[tick + 1] - drying[base_tick + 1]))
+            watering = rows[type_code][self._humidity_code(humidity)][tick]
+            if watering:
+                base, base_tick = min(100.0, humidity + watering), tick
+                bases[cohort].append((base, base_tick))
+                events[cohort].append((tick, watering))
+                growing = len(ends_sorted) - bisect.bisect_right(ends_sorted, tick)
+                watering_total[tick] += watering * growing
+
+            # Следующее событие: смена метки влажности или такт с ненулевым поливом
+            following = tick + 1
+            if following >= ends_sorted[-1]:
+                continue
+            humidity = max(0.0, base - (drying[following + 1] - drying[base_tick + 1]))
+            code = self._humidity_code(humidity)
+            candidates = active.get((type_code, code))
+            if candidates is None:
+                candidates = active[(type_code, code)] = np.flatnonzero(watering_table[type_code, code]).tolist()
+            position = bisect.bisect_left(candidates, following)
+            next_tick = candidates[position] if position < len(candidates) else None
+            exit_tick = self._exit_tick(drying, humidity, base, base_tick)
+            if exit_tick is not None and (next_tick is None or exit_tick < next_tick):
+                next_tick = exit_tick
+            if next_tick is not None and next_tick < ends_sorted[-1]:
+                heapq.heappush(queue, (next_tick, cohort))
+
+        logger.info("Событийная симуляция: %s тактов, %s событий, %s групп растений",
+                    total_ticks, event_count, len(cohorts))
+
+        result.record_ticks(
+            greenhouse.day_count + (start + ticks[:total_ticks]) // len(TIME_CYCLE),
+            time_codes[:total_ticks],
+            temperatures[:total_ticks],
+            watering_total,
+        )
+        for cohort in range(len(cohorts)):
+            self._finish_cohort(result, cumulative, members[cohort], cohort_ends[cohort],
+                                bases[cohort], events[cohort], history)
+
+        # Состояние теплицы после последнего такта
+        nights = (start + total_ticks) // len(TIME_CYCLE)
+        store.current_days[alive] += np.where(harvested, remaining, nights)
+        store.alive[alive[harvested]] = False
+        result.harvest_tick[alive[harvested]] = harvest[harvested]
+        greenhouse.day_count += nights
+        greenhouse.time_of_day = TIME_CYCLE[(start + total_ticks) % len(TIME_CYCLE)]
+        if not store.alive_count():
+            logger.info("Все растения выращены. Симуляция завершена.")
+        return result
+
+    def _finish_cohort(self, result, cumulative, members, ends, bases, events, history):
+        """
+        Восстанавливает влажность растений группы по тактам: записывает её в хранилище
+        (значение после последнего обработанного такта) и, при необходимости, в историю.
+        :param members: Индексы растений группы.
+        :param ends: Такт окончания обработки для каждого растения группы.
+        :param bases: Список (влажность после полива, такт полива), начиная с (начальная влажность, -1).
+        :param events: Список (такт, полив).
+        """
+        length = int(ends.max())
+        if length == 0:
+            return
+        base_ticks = np.array([tick for _, tick in bases])
+        base_values = np.array([value for value, _ in bases])
+        steps = np.arange(length)
+        segment = np.searchsorted(base_ticks, steps, side="right") - 1
+        humidity = np.maximum(0.0, base_values[segment]
+                              - (cumulative[steps + 1] - cumulative[base_ticks[segment] + 1]))
+        self.greenhouse.store.humidity[members] = humidity[ends - 1]
+
+        if history:
+            watering = np.zeros(length)
+            for tick, amount in events:
+                watering[tick] = amount
+            for end in np.unique(ends):
+                group = members[ends == end]
+                result.humidity[:end, group] = humidity[:end, None]
+                result.watering[:end, group] = watering[:end, None]
@@ -0,0 +1,105 @@
+import numpy as np
+
+TIME_CYCLE = ["ночь", "утро", "день", "вечер"]
+
+
+class SimulationResult:
+    def __init__(self, plant_names, plant_types, max_ticks, history=True):
+        """
+        Результат симуляции теплицы: временные ряды по тактам в заранее выделенных массивах.
+        Строки массивов соответствуют тактам, столбцы — растениям в порядке ввода.
+        Для уже выросших растений значения остаются NaN.
+        :param plant_names: Названия растений.
+        :param plant_types: Типы растений.
+        :param max_ticks: Максимальное количество тактов (размер выделяемых массивов).
+        :param history: Сохранять ли ряды по каждому растению; без них память не зависит
+                        от числа растений, остаются только суммарные показатели по тактам.
+        """
+        count = len(plant_names)
+        self.plant_names = list(plant_names)
+        self.plant_types = list(plant_types)
+        self.max_ticks = max_ticks
+        self.ticks = 0
+        self.temperature = np.full(max_ticks, np.nan)
+        self.day = np.zeros(max_ticks, dtype=np.int64)
+        self.time_of_day = np.zeros(max_ticks, dtype=np.int8)  # Индекс в TIME_CYCLE
+        self.watering_total = np.zeros(max_ticks)
+        self.humidity = np.full((max_ticks, count), np.nan) if history else None
+        self.watering = np.full((max_ticks, count), np.nan) if history else None
+        self.harvest_tick = np.full(count, -1, dtype=np.int64)  # -1 — растение не успело вырасти
+
+    def record_tick(self, day, time_of_day, temperature, indices, humidity, watering):
+        """
+        Записывает состояние теплицы за такт.
+        :param day: Номер дня.
+        :param time_of_day: Время суток (строка из TIME_CYCLE).
+        :param temperature: Температура за такт.
+        :param indices: Индексы растущих растений.
+        :param humidity: Влажность этих растений после полива.
+        :param watering: Полив этих растений.
+        """
+        tick = self.ticks
+        self.day[tick] = day
+        self.time_of_day[tick] = TIME_CYCLE.index(time_of_day)
+        self.temperature[tick] = temperature
+        self.watering_total[tick] = np.sum(watering)
+        if self.humidity is not None:
+            self.humidity[tick, indices] = humidity
+            self.watering[tick, indices] = watering
+        self.ticks += 1
+
+    def record_ticks(self, day, time_of_day, temperature, watering_total):
+        """
+        Записывает сразу несколько тактов без рядов по растениям (событийная симуляция
+        заполняет их отдельно).
+        :param day: Номера дней по тактам.
+        :param time_of_day: Индексы времени суток в TIME_CYCLE по тактам.
+        :param temperature: Температуры по тактам.
+        :param watering_total: Суммарный полив по тактам.
+        """
+        start, stop = self.ticks, self.ticks + len(temperature)
+        self.day[start:stop] = day
+        self.time_of_day[start:stop] = time_of_day
+        self.temperature[start:stop] = temperature
+        self.watering_total[start:stop] = watering_total
+        self.ticks = stop
+
+    def record_harvest(self, indices):
+        """
+        Отмечает растения, выросшие на последнем записанном такте.
+        :param indices: Индексы выросших растений.
+        """
+        self.harvest_tick[indices] = self.ticks - 1
+
+    @property
+    def completed(self):
+        """
+        True, если все растения выросли до исчерпания бюджета тактов.
+        """
+        return bool(np.all(self.harvest_tick >= 0))
+
+    def trimmed(self):
+        """
+        Возвращает словарь с временными рядами, обрезанными до фактического числа тактов.
+        """
+        ticks = self.ticks
+        return {
+            "temperature": self.temperature[:ticks],
+            "day": self.day[:ticks],
+            "time_of_day": self.time_of_day[:ticks],
+            "watering_total": self.watering_total[:ticks],
+            "humidity": self.humidity[:ticks] if self.humidity is not None else None,
+            "watering": self.watering[:ticks] if self.watering is not None else None,
+        }
+
+    def summary(self):
+        """
+        Краткая сводка по симуляции.
+        """
+        return {
+            "plants": len(self.plant_names),
+            "ticks": self.ticks,
+            "days": int(self.day[self.ticks - 1]) if self.ticks else 0,
+            "harvested": int(np.count_nonzero(self.harvest_tick >= 0)),
+            "total_watering": float(self.watering_total[:self.ticks].sum()),
+        }
@@ -1,25 +1,228 @@
+import argparse
+import asyncio
+import logging
+import os
+from contextlib import nullcontext
+
+from async_knowledge_base import AsyncNeo4jDB
+from checkpoint import Checkpointer, load_checkpoint
 from greenhouse import Greenhouse
+from ingestion import StreamSensor
 from knowledge_base import Neo4jDB, PLANT_TYPES
+from memory_db import InMemoryDB
+from metrics import Metrics, profiled, sink_for_path
+from plant_store import DEFAULT_ZONE
 
-uri = "neo4j+s://ef635998.databases.neo4j.io"
-user = "neo4j"
-password = "yh1CJiDIRo0njrAyEQWd9MEEzpGcGTFMnRHP2GZf7Fs"
+uri = os.environ.get("NEO4J_URI", "neo4j+s://ef635998.databases.neo4j.io")
+user = os.environ.get("NEO4J_USER", "neo4j")
+password = os.environ.get("NEO4J_PASSWORD", "yh1CJiDIRo0njrAyEQWd9MEEzpGcGTFMnRHP2GZf7Fs")
+
+
+def create_db(backend, metrics=None):
+    """
+    Создаёт базу знаний выбранного типа.
+    :param backend: "neo4j" — удалённая база Neo4j, "memory" — локальная база в памяти.
+    :param metrics: Экземпляр Metrics для учёта запросов к Neo4j.
+    :return: Экземпляр базы знаний.
+    """
+    if backend == "memory":
+        return InMemoryDB()
+    return Neo4jDB(uri, user, password, metrics=metrics)
+
+
+def create_metrics(path):
+    """
+    Создаёт метрики с приёмником по расширению файла (.prom — Prometheus, иначе JSON lines).
+    :param path: Путь к файлу; None — метрики не собираются.
+    """
+    return Metrics([sink_for_path(path)]) if path else None
+
+
+def parse_plants(tokens):
+    """
+    Разбирает ввод растений: "название" или "название@зона".
+    :return: Кортеж (названия, зоны).
+    """
+    names, zones = [], []
+    for token in tokens:
+        name, _, zone = token.partition("@")
+        names.append(name)
+        zones.append(zone or DEFAULT_ZONE)
+    return names, zones
+
+
+def create_sensor(feed):
+    """
+    Датчики теплицы: поток показаний из файла или сокета либо генератор случайной температуры.
+    :param feed: Путь к .csv/.jsonl, "host:port" или None.
+    """
+    return StreamSensor.from_source(feed) if feed else None
+
+
+def create_checkpointer(args, resume_ticks=None):
+    """
+    Периодические снимки и история тактов по аргументам --checkpoint и --history-file.
+    :param resume_ticks: Количество тактов в истории на момент восстановленного снимка.
+    :return: Checkpointer или None, если снимки не нужны.
+    """
+    if not args.checkpoint:
+        return None
+    return Checkpointer(args.checkpoint, every=args.checkpoint_every,
+                        history_path=args.history_file, resume_ticks=resume_ticks)
+
+
+def setup_knowledge_base(db):
+    """
+    Подготовка базы знаний Neo4j: ограничения и индексы, миграция правил и категорий растений,
+    проверка планов запросов. Повторный запуск безопасен.
+    :param db: Экземпляр Neo4jDB.
+    """
+    db.setup_schema()
+    if db.setup_ontology_and_rules():
+        logging.info("Правила полива в базе знаний обновлены.")
+    db.initialize_plant_types()
+    for query, scans in db.verify_query_plans().items():
+        if not scans:
+            logging.info("Запрос %s использует индексы.", query)
+
+
+async def run_async(args, plant_names, plant_zones=None, metrics=None):
+    """
+    Запускает симуляцию с асинхронным драйвером Neo4j: правила полива запрашиваются
+    из базы конкурентно для состояний растений такта (без индекса правил в памяти).
+    :param args: Аргументы командной строки.
+    :param plant_names: Названия растений (не используются при --resume).
+    :param plant_zones: Зоны растений.
+    :param metrics: Экземпляр Metrics или None.
+    :return: SimulationResult.
+    """
+    db = AsyncNeo4jDB(uri, user, password, metrics=metrics)
+    try:
+        options = dict(use_rule_index=False, inference=args.inference, cache_decisions=args.cache_decisions,
+                       metrics=metrics, sensor=create_sensor(args.sensor_feed), rng=args.seed)
+        resume_ticks = None
+        if args.resume:
+            greenhouse, resume_ticks = load_checkpoint(args.checkpoint, db, **options)
+        else:
+            greenhouse = await Greenhouse.create_async(db, plant_names, plant_zones=plant_zones, **options)
+        return await greenhouse.run_simulation_async(headless=args.headless, max_ticks=args.max_ticks,
+                                                     checkpointer=create_checkpointer(args, resume_ticks))
+    finally:
+        await db.close()
+
+
+def simulate(args, metrics=None):
+    """
+    Запускает симуляцию в выбранном режиме по аргументам командной строки.
+    :param args: Аргументы командной строки.
+    :param metrics: Экземпляр Metrics или None.
+    """
+    profiler = profiled(args.profile or None) if args.profile is not None else nullcontext()
+
+    if args.use_async:
+        if args.setup_kb:
+            # Схема и миграция правил выполняются синхронным драйвером до запуска симуляции
+            db = create_db(args.backend, metrics)
+            try:
+                setup_knowledge_base(db)
+            finally:
+                db.close()
+        plant_names, plant_zones = None, None
+        if not args.resume:
+            print("Введите названия растений через пробел (зона — через @):")
+            plant_names, plant_zones = parse_plants(input().split())
+        with profiler:
+            result = asyncio.run(run_async(args, plant_names, plant_zones, metrics))
+        if args.headless:
+            print(result.summary())
+        return
 
-def main():
     # Инициализация базы знаний
-    db = Neo4jDB(uri, user, password)
-    # db.setup_ontology_and_rules()
-    # db.initialize_plant_types()
+    db = create_db(args.backend, metrics)
+    if args.setup_kb:
+        setup_knowledge_base(db)
 
-    # Ввод пользователя: названия растений через пробел
-    print("Введите названия растений через пробел:")
-    plant_names = input().split()
+    options = dict(use_rule_index=True, inference=args.inference, cache_decisions=args.cache_decisions,
+                   metrics=metrics, sensor=create_sensor(args.sensor_feed), rng=args.seed)
+    resume_ticks = None
+    if args.resume:
+        # Продолжение из снимка: растения и состояние генератора берутся из файла
+        greenhouse, resume_ticks = load_checkpoint(args.checkpoint, db, **options)
+    else:
+        # Ввод пользователя: названия растений через пробел
+        print("Введите названия растений через пробел (зона — через @):")
+        plant_names, plant_zones = parse_plants(input().split())
 
-    # Инициализация теплицы
-    greenhouse = Greenhouse(db, plant_names)
+        # Инициализация теплицы
+        greenhouse = Greenhouse(db, plant_names, plant_zones=plant_zones, **options)
+
+    checkpointer = create_checkpointer(args, resume_ticks)
 
     # Запуск симуляции
-    greenhouse.run_simulation()
+    with profiler:
+        if args.event_driven:
+            result = greenhouse.run_simulation_events(max_ticks=args.max_ticks)
+        else:
+            result = greenhouse.run_simulation(headless=args.headless, max_ticks=args.max_ticks,
+                                               checkpointer=checkpointer)
+    if args.headless:
+        print(result.summary())
+        if args.cache_decisions:
+            print(greenhouse.rule_engine.decision_cache_stats())
+        if metrics is not None:
+            print(greenhouse.rule_engine.rule_stats())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Симуляция теплицы")
+    parser.add_argument("--backend", choices=["neo4j", "memory"], default="neo4j",
+                        help="База знаний: удалённая Neo4j или локальная в памяти")
+    parser.add_argument("--inference", choices=["crisp", "mamdani"], default="crisp",
+                        help="Режим вывода: первое подходящее правило или нечеткий вывод по Мамдани")
+    parser.add_argument("--headless", action="store_true",
+                        help="Быстрая симуляция без пауз и подробного вывода")
+    parser.add_argument("--max-ticks", type=int, default=None,
+                        help="Бюджет тактов симуляции (по умолчанию — до созревания всех растений)")
+    parser.add_argument("--async", dest="use_async", action="store_true",
+                        help="Асинхронная симуляция с конкурентными запросами к Neo4j")
+    parser.add_argument("--cache-decisions", action="store_true",
+                        help="Кэшировать решения о поливе для повторяющихся нечетких состояний")
+    parser.add_argument("--event-driven", action="store_true",
+                        help="Событийная симуляция (только четкий режим): пропуск тактов без изменений")
+    parser.add_argument("--sensor-feed", default=None,
+                        help="Показания датчиков зон: файл .csv/.jsonl (tick, zone, temperature) или host:port")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="Зерно генератора температур (numpy.random.Generator) для воспроизводимых запусков")
+    parser.add_argument("--metrics", default=None,
+                        help="Файл для метрик: .prom — формат Prometheus, иначе JSON lines с событиями тактов")
+    parser.add_argument("--profile", nargs="?", const="", default=None,
+                        help="Профилировать симуляцию через cProfile (статистика в файл или на экран)")
+    parser.add_argument("--checkpoint", default=None,
+                        help="Файл снимка состояния (.npz), сохраняется периодически и в конце симуляции")
+    parser.add_argument("--checkpoint-every", type=int, default=1000, help="Период сохранения снимка в тактах")
+    parser.add_argument("--history-file", default=None,
+                        help="Двоичный файл истории тактов (дописывается, читается через np.memmap)")
+    parser.add_argument("--resume", action="store_true", help="Продолжить симуляцию из снимка --checkpoint")
+    parser.add_argument("--setup-kb", action="store_true",
+                        help="Создать схему Neo4j, обновить правила и категории растений и проверить планы запросов")
+    args = parser.parse_args()
+    if args.use_async and args.backend != "neo4j":
+        parser.error("--async работает только с базой знаний Neo4j (--backend neo4j)")
+    if (args.resume or args.history_file) and not args.checkpoint:
+        parser.error("--resume и --history-file требуют --checkpoint")
+    if args.event_driven and args.checkpoint:
+        parser.error("--event-driven пропускает такты и не поддерживает --checkpoint")
+    if args.setup_kb and args.backend != "neo4j":
+        parser.error("--setup-kb работает только с базой знаний Neo4j (--backend neo4j)")
+
+    logging.basicConfig(level=logging.WARNING if args.headless else logging.INFO, format="%(message)s")
+    metrics = create_metrics(args.metrics)
+    try:
+        simulate(args, metrics)
+    finally:
+        if metrics is not None:
+            metrics.close()  # Закрывает файл приёмника JSON lines
+
 
 if __name__ == "__main__":
     main()